@@ -2,7 +2,12 @@ import asyncio
 from aiogram import Bot, Dispatcher
 
 from config import TOKEN
+from excel_export import start_export_pool, stop_export_pool
 from handlers import start, farmers, contracts, mineral
+from services.activity_logger import start_activity_logger, stop_activity_logger
+from services.api_client import close_session, start_session
+from services.prefetch import cancel_all_prefetches
+from services.table_image import start_render_pool, stop_render_pool
 
 bot = Bot(token=TOKEN)
 dp = Dispatcher()
@@ -12,6 +17,16 @@ dp.include_router(farmers.router)
 dp.include_router(contracts.router)
 dp.include_router(mineral.router)
 
+dp.startup.register(start_session)
+dp.startup.register(start_activity_logger)
+dp.startup.register(start_render_pool)
+dp.startup.register(start_export_pool)
+dp.shutdown.register(cancel_all_prefetches)
+dp.shutdown.register(stop_activity_logger)
+dp.shutdown.register(stop_render_pool)
+dp.shutdown.register(stop_export_pool)
+dp.shutdown.register(close_session)
+
 
 async def main():
     await dp.start_polling(bot)
@@ -19,4 +34,3 @@ async def main():
 
 if __name__ == "__main__":
     asyncio.run(main())
-
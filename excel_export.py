@@ -1,8 +1,52 @@
 #11111111111111111111111111
-from io import BytesIO
+import asyncio
+import csv
+import gzip
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from io import BytesIO, TextIOWrapper
 from datetime import datetime
-import pandas as pd
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Workbooks are built off the event loop; "process" keeps openpyxl's pure-Python
+# writing from holding the bot's GIL, "thread" avoids worker start-up on small hosts.
+EXPORT_POOL_KIND = "process"
+EXPORT_WORKERS = max(1, min(2, os.cpu_count() or 1))
+# Exports running at once; later requests wait in line and are told their position.
+EXPORT_MAX_CONCURRENT = EXPORT_WORKERS
+# Movement xlsx exports above this many rows are sent as zipped per-month workbooks.
+EXPORT_SPLIT_ROWS = 20_000
+# Telegram rejects bot uploads over 50 MB; each zip part stays below this.
+EXPORT_MAX_PART_BYTES = 45 * 1024 * 1024
+# File extension per export format. Every format is written from the same
+# (columns, rows) as the workbook; Parquet is offered only when pyarrow is installed.
+EXPORT_FORMATS = {
+    "xlsx": ".xlsx",
+    "csv": ".csv.gz",
+}
+if pyarrow is not None:
+    EXPORT_FORMATS["parquet"] = ".parquet"
+EXPORT_DEFAULT_FORMAT = "xlsx"
+# zlib's default level; 9 is several times slower for a few percent smaller files.
+CSV_GZIP_LEVEL = 6
 
 
 def _as_int_amount(value):
@@ -70,23 +114,120 @@ def _excel_date_rank(value):
     )
 
 
-def _autosize_and_bold(worksheet):
-    for cell in worksheet[1]:
-        cell.font = Font(bold=True)
+_HEADER_FONT = Font(bold=True)
+# Rows are measured in batches as they are generated, one column at a time.
+WIDTH_BATCH_ROWS = 1024
+
+
+class _ColumnWidths:
+    """Running max of len(str(value)) per column; None cells do not count."""
+
+    def __init__(self, columns: Sequence[str]):
+        self._lengths = [len(str(name)) for name in columns]
+
+    def update(self, rows: Sequence[Sequence]) -> None:
+        for index, values in enumerate(zip(*rows)):
+            if None in values:
+                values = [value for value in values if value is not None]
+                if not values:
+                    continue
+            self._lengths[index] = max(self._lengths[index], max(map(len, map(str, values))))
 
-    for column in worksheet.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
+    def widths(self) -> list[int]:
+        return [length + 2 for length in self._lengths]
 
-        for cell in column:
-            value = cell.value
-            if value is not None:
-                max_length = max(max_length, len(str(value)))
 
-        worksheet.column_dimensions[column_letter].width = max_length + 2
+def _write_sheet(sheet_name: str, columns: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """Write one bold-headed, autosized sheet with openpyxl's write-only (streaming) worksheet."""
+    # Column widths precede the cell data in the sheet XML, so rows are collected
+    # as plain tuples while their widths are measured; no DataFrame or Cell
+    # objects are built and the sheet is never re-walked.
+    column_widths = _ColumnWidths(columns)
+    collected: list[Sequence] = []
+    measured = 0
+    for row in rows:
+        collected.append(row)
+        if len(collected) - measured >= WIDTH_BATCH_ROWS:
+            column_widths.update(collected[measured:])
+            measured = len(collected)
+    column_widths.update(collected[measured:])
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    for index, width in enumerate(column_widths.widths(), start=1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    header = []
+    for name in columns:
+        cell = WriteOnlyCell(worksheet, value=name)
+        cell.font = _HEADER_FONT
+        header.append(cell)
+    worksheet.append(header)
+
+    for row in collected:
+        worksheet.append(row)
+
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
 
 
-async def farmers_to_excel(data: list):
+def _write_csv(sheet_name: str, columns: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """Stream rows straight into a gzipped CSV; nothing is collected or measured."""
+    buffer = BytesIO()
+    with gzip.GzipFile(f"{sheet_name}.csv", "wb", CSV_GZIP_LEVEL, buffer, mtime=0) as compressed:
+        # The BOM lets Excel detect UTF-8 when the file is opened directly.
+        with TextIOWrapper(compressed, encoding="utf-8-sig", newline="") as text:
+            writer = csv.writer(text)
+            writer.writerow(columns)
+            writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _parquet_column(values: Sequence):
+    # "" marks blank cells (e.g. № in the totals row); Parquet stores them as nulls
+    # so numeric columns keep a numeric type. Mixed columns fall back to strings.
+    values = [None if value == "" else value for value in values]
+    kinds = {type(value) for value in values if value is not None}
+    if kinds <= {int}:
+        return pyarrow.array(values, type=pyarrow.int64())
+    if kinds <= {int, float}:
+        return pyarrow.array(values, type=pyarrow.float64())
+    return pyarrow.array([None if value is None else str(value) for value in values], type=pyarrow.string())
+
+
+def _write_parquet(sheet_name: str, columns: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    rows = list(rows)
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    table = pyarrow.Table.from_arrays([_parquet_column(column) for column in values], names=list(columns))
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+_EXPORT_WRITERS = {
+    "xlsx": _write_sheet,
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+}
+
+
+def _write_table(fmt: str, sheet_name: str, columns: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return _EXPORT_WRITERS[fmt](sheet_name, columns, rows)
+
+
+def export_format(token: str | None = None) -> str:
+    """Export format named in callback data; older buttons carry none and mean xlsx."""
+    return token if token in EXPORT_FORMATS else EXPORT_DEFAULT_FORMAT
+
+
+def export_filename(stem: str, fmt: str) -> str:
+    return f"{stem}{EXPORT_FORMATS[fmt]}"
+
+
+def _farmers_workbook(data: list, fmt: str = EXPORT_DEFAULT_FORMAT):
     if not data:
         return None
 
@@ -98,67 +239,71 @@ async def farmers_to_excel(data: list):
         },
         key=lambda value: value.lower(),
     )
-
-    formatted = []
-    for index, farmer in enumerate(data, start=1):
-        row = {
-            "№": index,
-            "Туман": farmer.get("district") or "-",
-            "Массив": farmer.get("massive") or "-",
-            "Фермер номи": farmer.get("name") or "-",
-            "Шартнома миқдори (фақат фючерс)": _as_int_amount(farmer.get("futures_quantity")),
-            "Шартнома суммаси": _as_int_amount(farmer.get("futures_amount")),
-        }
-
-        product_totals = farmer.get("product_totals") or {}
-        for product_name in all_products:
-            row[product_name] = _as_int_amount(product_totals.get(product_name))
-
-        total_advance = float(farmer.get("farmer_total_amount") or 0)
-        futures_quantity = float(farmer.get("futures_quantity") or 0)
-        futures_amount = float(farmer.get("futures_amount") or 0)
+    columns = [
+        "№",
+        "Туман",
+        "Массив",
+        "Фермер номи",
+        "Шартнома миқдори (фақат фючерс)",
+        "Шартнома суммаси",
+        *all_products,
+        "Жами (минг сўм)",
+        "Терим пули (минг сўм)",
+        "Жами (аванс + терим пули, минг сўм)",
+        "Жами аванс шартноманинг % ташкил қилади",
+        "Авансни қоплаш учун лозим бўлган пахта миқдори",
+    ]
+
+    def analysis_cells(total_advance: float, futures_quantity: float, futures_amount: float) -> tuple:
         picking_fee = futures_quantity * PICKING_RATE
         total_for_analysis = total_advance + picking_fee
-        row["Жами (минг сўм)"] = _as_thousand_amount(total_advance)
-        row["Терим пули (минг сўм)"] = _as_thousand_amount(picking_fee)
-        row["Жами (аванс + терим пули, минг сўм)"] = _as_thousand_amount(total_for_analysis)
-        row["Жами аванс шартноманинг % ташкил қилади"] = _as_percent(
-            (total_for_analysis / futures_amount * 100) if futures_amount > 0 else 0
+        return (
+            _as_thousand_amount(total_advance),
+            _as_thousand_amount(picking_fee),
+            _as_thousand_amount(total_for_analysis),
+            _as_percent((total_for_analysis / futures_amount * 100) if futures_amount > 0 else 0),
+            _as_int_amount(total_for_analysis / COTTON_PRICE),
         )
-        row["Авансни қоплаш учун лозим бўлган пахта миқдори"] = _as_int_amount(total_for_analysis / COTTON_PRICE)
-        formatted.append(row)
-
-    totals_row = {
-        "№": "",
-        "Туман": "",
-        "Массив": "",
-        "Фермер номи": "Жами",
-        "Шартнома миқдори (фақат фючерс)": _as_int_amount(sum(float(farmer.get("futures_quantity") or 0) for farmer in data)),
-        "Шартнома суммаси": _as_int_amount(sum(float(farmer.get("futures_amount") or 0) for farmer in data)),
-    }
-    for product_name in all_products:
-        totals_row[product_name] = _as_int_amount(sum(float((farmer.get("product_totals") or {}).get(product_name) or 0) for farmer in data))
-    grand_total_advance = sum(float(farmer.get("farmer_total_amount") or 0) for farmer in data)
-    grand_total_picking_fee = sum(float(farmer.get("futures_quantity") or 0) for farmer in data) * PICKING_RATE
-    grand_total_futures_amount = sum(float(farmer.get("futures_amount") or 0) for farmer in data)
-    grand_total_for_analysis = grand_total_advance + grand_total_picking_fee
-    totals_row["Жами (минг сўм)"] = _as_thousand_amount(grand_total_advance)
-    totals_row["Терим пули (минг сўм)"] = _as_thousand_amount(grand_total_picking_fee)
-    totals_row["Жами (аванс + терим пули, минг сўм)"] = _as_thousand_amount(grand_total_for_analysis)
-    totals_row["Жами аванс шартноманинг % ташкил қилади"] = _as_percent(
-        (grand_total_for_analysis / grand_total_futures_amount * 100) if grand_total_futures_amount > 0 else 0
-    )
-    totals_row["Авансни қоплаш учун лозим бўлган пахта миқдори"] = _as_int_amount(grand_total_for_analysis / COTTON_PRICE)
-    formatted.append(totals_row)
 
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Farmers")
-        _autosize_and_bold(writer.sheets["Farmers"])
+    def rows():
+        for index, farmer in enumerate(data, start=1):
+            product_totals = farmer.get("product_totals") or {}
+            yield (
+                index,
+                farmer.get("district") or "-",
+                farmer.get("massive") or "-",
+                farmer.get("name") or "-",
+                _as_int_amount(farmer.get("futures_quantity")),
+                _as_int_amount(farmer.get("futures_amount")),
+                *(_as_int_amount(product_totals.get(product_name)) for product_name in all_products),
+                *analysis_cells(
+                    float(farmer.get("farmer_total_amount") or 0),
+                    float(farmer.get("futures_quantity") or 0),
+                    float(farmer.get("futures_amount") or 0),
+                ),
+            )
+
+        grand_futures_quantity = sum(float(farmer.get("futures_quantity") or 0) for farmer in data)
+        grand_futures_amount = sum(float(farmer.get("futures_amount") or 0) for farmer in data)
+        yield (
+            "",
+            "",
+            "",
+            "Жами",
+            _as_int_amount(grand_futures_quantity),
+            _as_int_amount(grand_futures_amount),
+            *(
+                _as_int_amount(sum(float((farmer.get("product_totals") or {}).get(product_name) or 0) for farmer in data))
+                for product_name in all_products
+            ),
+            *analysis_cells(
+                sum(float(farmer.get("farmer_total_amount") or 0) for farmer in data),
+                grand_futures_quantity,
+                grand_futures_amount,
+            ),
+        )
 
-    buffer.seek(0)
-    return buffer
+    return _write_table(fmt, "Farmers", columns, rows())
 
 
 CONTRACT_TYPE_LABELS = {
@@ -169,75 +314,73 @@ CONTRACT_TYPE_LABELS = {
 }
 
 
-async def contracts_to_excel(data: list, contract_type: str = "all"):
+def _contracts_workbook(data: list, contract_type: str = "all", fmt: str = EXPORT_DEFAULT_FORMAT):
     if not data:
         return None
 
-    formatted = []
-    for index, item in enumerate(data, start=1):
-        row_contract_type = item.get("contract_type", contract_type)
-        contract_type_label = CONTRACT_TYPE_LABELS.get(row_contract_type, "Ҳаммаси")
-        formatted.append(
-            {
-                "№": index,
-                "Шартнома тури": contract_type_label,
-                "Вилоят": item["region"],
-                "Туман": item["district"],
-                "Массив": item["massive"],
-                "Фермер": item["name"],
-                "ИНН": item.get("inn") or "-",
-                "Миқдор (тн)": float(item["quantity"]),
-                "Сумма": float(item["amount"]),
-            }
+    columns = ["№", "Шартнома тури", "Вилоят", "Туман", "Массив", "Фермер", "ИНН", "Миқдор (тн)", "Сумма"]
+    rows = (
+        (
+            index,
+            CONTRACT_TYPE_LABELS.get(item.get("contract_type", contract_type), "Ҳаммаси"),
+            item["region"],
+            item["district"],
+            item["massive"],
+            item["name"],
+            item.get("inn") or "-",
+            float(item["quantity"]),
+            float(item["amount"]),
         )
-
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
-
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Contracts")
-        _autosize_and_bold(writer.sheets["Contracts"])
-
-    buffer.seek(0)
-    return buffer
+        for index, item in enumerate(data, start=1)
+    )
+    return _write_table(fmt, "Contracts", columns, rows)
 
 
-async def warehouse_receipts_to_excel(data: list[dict]):
+def _warehouse_receipts_workbook(data: list[dict], fmt: str = EXPORT_DEFAULT_FORMAT):
     if not data:
         return None
 
     data = sorted(data, key=lambda row: _excel_date_sort_key(row.get("date")), reverse=True)
 
-    formatted = []
-    for index, item in enumerate(data, start=1):
-        formatted.append(
-            {
-                "№": index,
-                "Сана": _excel_date(item.get("date")),
-                "Юк-хати №": item.get("invoice_number") or "-",
-                "Маҳсулот": item.get("product_name") or "-",
-                "Транспорт №": item.get("transport_number") or "-",
-                "Қоп сони": item.get("bag_count") or 0,
-                "Миқдори": float(item.get("quantity") or 0),
-                "Омбор": item.get("warehouse_name") or "-",
-            }
+    columns = ["№", "Сана", "Юк-хати №", "Маҳсулот", "Транспорт №", "Қоп сони", "Миқдори", "Омбор"]
+    rows = (
+        (
+            index,
+            _excel_date(item.get("date")),
+            item.get("invoice_number") or "-",
+            item.get("product_name") or "-",
+            item.get("transport_number") or "-",
+            item.get("bag_count") or 0,
+            float(item.get("quantity") or 0),
+            item.get("warehouse_name") or "-",
         )
-
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
-
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="WarehouseReceipts")
-        _autosize_and_bold(writer.sheets["WarehouseReceipts"])
-
-    buffer.seek(0)
-    return buffer
+        for index, item in enumerate(data, start=1)
+    )
+    return _write_table(fmt, "WarehouseReceipts", columns, rows)
 
 
-async def warehouse_expenses_to_excel(data: list[dict], mode: str = "out", include_warehouse_name: bool = False):
+def _warehouse_expenses_workbook(
+    data: list[dict],
+    mode: str = "out",
+    include_warehouse_name: bool = False,
+    fmt: str = EXPORT_DEFAULT_FORMAT,
+):
     if not data:
         return None
 
+    if mode == "report":
+        columns = ["№", "Туман", f"Бир кунда ({datetime.now().strftime('%d.%m.%Y')})", "Миқдори (умумий)"]
+        rows = (
+            (
+                index,
+                item.get("district_name") or "-",
+                float(item.get("today_quantity") or 0),
+                float(item.get("total_quantity") or item.get("quantity") or 0),
+            )
+            for index, item in enumerate(data, start=1)
+        )
+        return _write_table(fmt, "WarehouseExpenses", columns, rows)
+
     if mode == "out":
         data = sorted(
             data,
@@ -252,51 +395,49 @@ async def warehouse_expenses_to_excel(data: list[dict], mode: str = "out", inclu
             ),
         )
 
-    formatted = []
-    for index, item in enumerate(data, start=1):
-        if mode == "report":
-            formatted.append(
-                {
-                    "№": index,
-                    "Туман": item.get("district_name") or "-",
-                    f"Бир кунда ({datetime.now().strftime('%d.%m.%Y')})": float(item.get("today_quantity") or 0),
-                    "Миқдори (умумий)": float(item.get("total_quantity") or item.get("quantity") or 0),
-                }
-            )
-            continue
-
-        line = {
-            "№": index,
-            "Сана": _excel_date(item.get("date")),
-            "Туман": item.get("district_name") or "-",
-            "Массив": item.get("massive_name") or "-",
-            "ИНН": item.get("inn") or "-",
-            "Фермер номи": item.get("farmer_name") or "-",
-            "Юк хати №": item.get("number") or "-",
-            "Маҳсулот": item.get("product_name") or "-",
-            "Нархи": float(item.get("price") or 0),
-            "Миқдори": float(item.get("quantity") or 0),
-            "НДС ставкаси": item.get("vat_rate") or "0",
-            "Суммаси": float(item.get("amount") or 0),
-            "НДС суммаси": float(item.get("vat_amount") or 0),
-            "Жами сумма": float(item.get("total_with_vat") or 0),
-        }
-        if include_warehouse_name:
-            line["Омбор номи"] = item.get("warehouse_name") or "-"
-        formatted.append(line)
-
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
-
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="WarehouseExpenses")
-        _autosize_and_bold(writer.sheets["WarehouseExpenses"])
-
-    buffer.seek(0)
-    return buffer
+    columns = [
+        "№",
+        "Сана",
+        "Туман",
+        "Массив",
+        "ИНН",
+        "Фермер номи",
+        "Юк хати №",
+        "Маҳсулот",
+        "Нархи",
+        "Миқдори",
+        "НДС ставкаси",
+        "Суммаси",
+        "НДС суммаси",
+        "Жами сумма",
+    ]
+    if include_warehouse_name:
+        columns.append("Омбор номи")
+
+    rows = (
+        (
+            index,
+            _excel_date(item.get("date")),
+            item.get("district_name") or "-",
+            item.get("massive_name") or "-",
+            item.get("inn") or "-",
+            item.get("farmer_name") or "-",
+            item.get("number") or "-",
+            item.get("product_name") or "-",
+            float(item.get("price") or 0),
+            float(item.get("quantity") or 0),
+            item.get("vat_rate") or "0",
+            float(item.get("amount") or 0),
+            float(item.get("vat_amount") or 0),
+            float(item.get("total_with_vat") or 0),
+            *((item.get("warehouse_name") or "-",) if include_warehouse_name else ()),
+        )
+        for index, item in enumerate(data, start=1)
+    )
+    return _write_table(fmt, "WarehouseExpenses", columns, rows)
 
 
-async def warehouse_summary_to_excel(summary: dict):
+def _warehouse_summary_workbook(summary: dict, fmt: str = EXPORT_DEFAULT_FORMAT):
     products = summary.get("products") or []
     rows = summary.get("rows") or []
     totals = summary.get("totals") or {"warehouse_name": "Жами", "products": []}
@@ -304,49 +445,195 @@ async def warehouse_summary_to_excel(summary: dict):
     if not products or not rows:
         return None
 
-    formatted = []
-    for row in rows:
-        line = {
-            "№": row.get("order") or "",
-            "Омбор номи": row.get("warehouse_name") or "-",
-        }
+    columns = ["№", "Омбор номи"]
+    for product in products:
+        product_name = product.get("product_name") or "Маҳсулот"
+        columns.extend([f"{product_name} (Кирим)", f"{product_name} (Чиқим)", f"{product_name} (Қолдиқ)"])
+
+    def product_cells(product_items: list[dict]) -> list[float]:
         product_rows = {
             int(item.get("product_id")): item
-            for item in row.get("products") or []
+            for item in product_items or []
             if item.get("product_id")
         }
+        cells = []
         for product in products:
-            product_id = int(product.get("product_id"))
-            product_name = product.get("product_name") or "Маҳсулот"
-            product_totals = product_rows.get(product_id, {})
-            line[f"{product_name} (Кирим)"] = float(product_totals.get("total_in") or 0)
-            line[f"{product_name} (Чиқим)"] = float(product_totals.get("total_out") or 0)
-            line[f"{product_name} (Қолдиқ)"] = float(product_totals.get("balance") or 0)
-        formatted.append(line)
-
-    totals_line = {
-        "№": "",
-        "Омбор номи": totals.get("warehouse_name") or "Жами",
-    }
-    product_totals_map = {
-        int(item.get("product_id")): item
-        for item in totals.get("products") or []
-        if item.get("product_id")
-    }
-    for product in products:
-        product_id = int(product.get("product_id"))
-        product_name = product.get("product_name") or "Маҳсулот"
-        product_totals = product_totals_map.get(product_id, {})
-        totals_line[f"{product_name} (Кирим)"] = float(product_totals.get("total_in") or 0)
-        totals_line[f"{product_name} (Чиқим)"] = float(product_totals.get("total_out") or 0)
-        totals_line[f"{product_name} (Қолдиқ)"] = float(product_totals.get("balance") or 0)
-    formatted.append(totals_line)
+            product_totals = product_rows.get(int(product.get("product_id")), {})
+            cells.append(float(product_totals.get("total_in") or 0))
+            cells.append(float(product_totals.get("total_out") or 0))
+            cells.append(float(product_totals.get("balance") or 0))
+        return cells
+
+    sheet_rows = [
+        (row.get("order") or "", row.get("warehouse_name") or "-", *product_cells(row.get("products")))
+        for row in rows
+    ]
+    sheet_rows.append(("", totals.get("warehouse_name") or "Жами", *product_cells(totals.get("products"))))
+    return _write_table(fmt, "WarehouseSummary", columns, sheet_rows)
+
+
+def _group_by_month(data: list[dict]) -> list[tuple[str, list[dict]]]:
+    months: dict[datetime, list[dict]] = {}
+    for item in data:
+        parsed = _excel_date_sort_key(item.get("date"))
+        months.setdefault(parsed.replace(day=1, hour=0, minute=0, second=0, microsecond=0), []).append(item)
+
+    # Latest month first, like the rows inside each workbook; undated rows go last.
+    return [
+        (month.strftime("%Y-%m") if month != datetime.min else "undated", months[month])
+        for month in sorted(months, reverse=True)
+    ]
+
+
+def _warehouse_movements_archive(data: list[dict], movement: str, include_warehouse_name: bool = False) -> list[Path]:
+    """Write one workbook per month into zip files on disk, starting a new zip before EXPORT_MAX_PART_BYTES.
+
+    Only one month's workbook is in memory at a time. The caller owns and deletes the returned files.
+    """
+    stem = "warehouse_receipts" if movement == "in" else "warehouse_expenses"
+    parts: list[Path] = []
+    archive: zipfile.ZipFile | None = None
+    part_size = 0
+
+    try:
+        for month, rows in _group_by_month(data):
+            if movement == "in":
+                content = _warehouse_receipts_workbook(rows)
+            else:
+                content = _warehouse_expenses_workbook(rows, movement, include_warehouse_name)
+
+            if archive is None or (part_size and part_size + len(content) > EXPORT_MAX_PART_BYTES):
+                if archive is not None:
+                    archive.close()
+                fd, path = tempfile.mkstemp(prefix=f"{stem}_", suffix=".zip")
+                os.close(fd)
+                parts.append(Path(path))
+                # xlsx files are already deflated; storing them avoids a second compression pass.
+                archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+                part_size = 0
+
+            archive.writestr(f"{stem}_{month}.xlsx", content)
+            part_size += len(content)
+    except BaseException:
+        if archive is not None:
+            archive.close()
+        for path in parts:
+            path.unlink(missing_ok=True)
+        raise
+
+    if archive is not None:
+        archive.close()
+    return parts
+
+
+_export_executor: Executor | None = None
+_export_slots: asyncio.Semaphore | None = None
+_exports_pending = 0
+# Set while the current request already holds a place in the export queue.
+_export_reserved: ContextVar[bool] = ContextVar("export_reserved", default=False)
+
+
+def _get_export_executor() -> Executor:
+    global _export_executor
+
+    if _export_executor is None:
+        if EXPORT_POOL_KIND == "process":
+            # Spawned workers: forking a process that already runs an event loop and threads is unsafe.
+            _export_executor = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _export_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="excel-export")
+    return _export_executor
+
+
+async def start_export_pool():
+    _get_export_executor()
+
+
+async def stop_export_pool():
+    global _export_executor
+
+    executor, _export_executor = _export_executor, None
+    if executor is not None:
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
 
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="WarehouseSummary")
-        _autosize_and_bold(writer.sheets["WarehouseSummary"])
 
-    buffer.seek(0)
-    return buffer
+@asynccontextmanager
+async def export_queue_slot(message):
+    """Hold a place in the export queue for one request and tell the user their position.
+
+    The place is counted before the position is computed, so concurrent requests
+    never share a position; exports run inside the block reuse it.
+    """
+    global _exports_pending
+
+    _exports_pending += 1
+    position = max(0, _exports_pending - EXPORT_MAX_CONCURRENT)
+    token = _export_reserved.set(True)
+    try:
+        if position:
+            await message.answer(f"⏳ Экспорт навбатда: {position}-ўрин. Файл тайёр бўлиши билан юборилади.")
+        yield position
+    finally:
+        _export_reserved.reset(token)
+        _exports_pending -= 1
+
+
+async def _run_in_export_pool(builder, *args, **kwargs):
+    global _export_slots, _exports_pending
+
+    if _export_slots is None:
+        _export_slots = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
+    reserved = _export_reserved.get()
+    if not reserved:
+        _exports_pending += 1
+    try:
+        async with _export_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_export_executor(), partial(builder, *args, **kwargs))
+    finally:
+        if not reserved:
+            _exports_pending -= 1
+
+
+async def _run_export(builder, *args, **kwargs) -> BytesIO | None:
+    content = await _run_in_export_pool(builder, *args, **kwargs)
+    return BytesIO(content) if content else None
+
+
+async def farmers_to_excel(data: list, fmt: str = EXPORT_DEFAULT_FORMAT):
+    return await _run_export(_farmers_workbook, data, fmt)
+
+
+async def contracts_to_excel(data: list, contract_type: str = "all", fmt: str = EXPORT_DEFAULT_FORMAT):
+    return await _run_export(_contracts_workbook, data, contract_type, fmt)
+
+
+async def warehouse_receipts_to_excel(data: list[dict], fmt: str = EXPORT_DEFAULT_FORMAT):
+    return await _run_export(_warehouse_receipts_workbook, data, fmt)
+
+
+async def warehouse_expenses_to_excel(
+    data: list[dict],
+    mode: str = "out",
+    include_warehouse_name: bool = False,
+    fmt: str = EXPORT_DEFAULT_FORMAT,
+):
+    return await _run_export(_warehouse_expenses_workbook, data, mode, include_warehouse_name, fmt)
+
+
+async def warehouse_summary_to_excel(summary: dict, fmt: str = EXPORT_DEFAULT_FORMAT):
+    return await _run_export(_warehouse_summary_workbook, summary, fmt)
+
+
+async def warehouse_movements_archive(
+    data: list[dict],
+    movement: str,
+    include_warehouse_name: bool = False,
+) -> list[Path]:
+    if not data:
+        return []
+    return await _run_in_export_pool(_warehouse_movements_archive, data, movement, include_warehouse_name)
@@ -1,18 +1,27 @@
+from functools import partial
+from typing import AsyncIterable, Hashable, Mapping
+
 from aiogram import Router, F
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
-from services.api_client import get_contracts_summary
-from excel_export import contracts_to_excel
+from services.api_client import get_contracts_summary, iter_contracts_summary
+from excel_export import contracts_to_excel, export_filename, export_format, export_queue_slot
 from keyboards import contracts_filter_keyboard, contracts_pagination_keyboard, contracts_type_menu, farmers_menu
 from middlewares.access import access_required
+from services.cache import TTLCache
+from services.concurrency import gather_bounded
 from services.pagination import paginate_data
-from services.table_image import build_table_image, send_or_edit_table_image
+from services.prefetch import cancel_prefetch, schedule_prefetch
+from services.snapshot import get_snapshot, invalidate_snapshots
+from services.table_image import render_table_image, send_or_edit_table_image
 
 router = Router()
 PER_PAGE = 15
 FARMER_NAME_MAX_LENGTH = 22
+CONTRACTS_DATA_TTL = 60
 
 CONTRACT_TYPE_ALL = "all"
+CONTRACT_TYPES = ("futures", "forward", "storage")
 CONTRACT_TYPE_MAP = {
     "📊 Ҳаммаси": CONTRACT_TYPE_ALL,
     "📑 Фючерс": "futures",
@@ -25,6 +34,7 @@ CONTRACT_TYPE_LABELS = {
     "forward": "Форвард",
     "storage": "Сақлаш",
 }
+_contracts_data = TTLCache(max_size=len(CONTRACT_TYPE_MAP))
 
 
 def _truncate_farmer_name(name: str | None) -> str:
@@ -41,6 +51,8 @@ async def contracts_handler(message: Message):
 @access_required
 async def contracts_type_selected(message: Message):
     contract_type = CONTRACT_TYPE_MAP[message.text]
+    cancel_prefetch(message.chat.id)
+    invalidate_snapshots(message.chat.id, "contracts")
     data = await get_contracts_data(contract_type)
     districts = extract_districts(data)
     await message.answer(
@@ -66,6 +78,7 @@ async def contracts_pagination(callback: CallbackQuery):
 @router.callback_query(F.data.startswith("contracts_back_to_districts:"))
 @access_required
 async def contracts_back_to_filters(callback: CallbackQuery):
+    cancel_prefetch(callback.message.chat.id)
     contract_type = callback.data.split(":", 1)[1]
     data = await get_contracts_data(contract_type)
     districts = extract_districts(data)
@@ -80,11 +93,29 @@ async def contracts_back_to_filters(callback: CallbackQuery):
     await callback.answer()
 
 
-async def send_page(target, page, district_index, contract_type, edit):
+async def _build_snapshot(district_index, contract_type):
     data = await get_contracts_data(contract_type)
     districts = extract_districts(data)
     district = get_district_by_index(districts, district_index)
     filtered_data = filter_by_district(data, district)
+
+    if contract_type == CONTRACT_TYPE_ALL:
+        totals = build_all_contracts_totals(filtered_data)
+    else:
+        totals = {"quantity": sum(to_float(item.get("quantity")) for item in filtered_data)}
+
+    return {"district": district, "rows": filtered_data, "totals": totals}
+
+
+async def build_page(owner_id, page, district_index, contract_type):
+    snapshot = await get_snapshot(
+        owner_id,
+        "contracts",
+        (contract_type, district_index),
+        partial(_build_snapshot, district_index, contract_type),
+    )
+    district = snapshot["district"]
+    filtered_data = snapshot["rows"]
     page_data, start, end = paginate_data(filtered_data, page, PER_PAGE)
 
     district_title = "Ҳаммаси" if district == "all" else district
@@ -105,7 +136,7 @@ async def send_page(target, page, district_index, contract_type, edit):
             for index, contract in enumerate(page_data, start=start + 1)
         ]
 
-        totals = build_all_contracts_totals(filtered_data)
+        totals = snapshot["totals"]
         rows.append(
             [
                 "",
@@ -134,14 +165,14 @@ async def send_page(target, page, district_index, contract_type, edit):
             ]
             for index, contract in enumerate(page_data, start=start + 1)
         ]
-        total_quantity = sum(to_float(item.get("quantity")) for item in filtered_data)
+        total_quantity = snapshot["totals"]["quantity"]
         rows.append(["", "", "", "Жами", format_tons(total_quantity)])
         columns = ["№", "Туман", "Массив", "Фермер номи", type_label]
         column_widths = [120, 200, 200, 420, 210]
         column_alignments = ["center", "left", "left", "left", "center"]
         min_rows = PER_PAGE + 1
 
-    image_bytes = build_table_image(
+    image_bytes = await render_table_image(
         title="📑 Шартномалар",
         subtitle=f"Тури: {type_title} | Туман: {district_title}",
         top_note="тоннада",
@@ -154,46 +185,75 @@ async def send_page(target, page, district_index, contract_type, edit):
         min_rows=min_rows,
     )
 
-    keyboard = contracts_pagination_keyboard(page, end < len(filtered_data), district_index, contract_type)
+    return image_bytes, end < len(filtered_data)
+
+
+async def send_page(target, page, district_index, contract_type, edit):
+    image_bytes, has_next = await build_page(target.chat.id, page, district_index, contract_type)
+    keyboard = contracts_pagination_keyboard(page, has_next, district_index, contract_type)
     await send_or_edit_table_image(target, image_bytes, keyboard, edit)
 
+    if has_next:
+        schedule_prefetch(target.chat.id, partial(build_page, target.chat.id, page + 1, district_index, contract_type))
+
 
 @router.callback_query(F.data.startswith("contracts_export_excel:"))
 @access_required
 async def contracts_excel(callback: CallbackQuery):
-    _, contract_type, district_index = callback.data.split(":", 2)
-    data = await get_contracts_excel_data(contract_type)
-    districts = extract_districts(data)
-    district = get_district_by_index(districts, int(district_index))
-    filtered_data = filter_by_district(data, district)
+    async with export_queue_slot(callback.message):
+        _, contract_type, district_index, *options = callback.data.split(":")
+        fmt = export_format(*options[:1])
+        data = await get_contracts_excel_data(contract_type)
+        districts = extract_districts(data)
+        district = get_district_by_index(districts, int(district_index))
+        filtered_data = filter_by_district(data, district)
+
+        file_buffer = await contracts_to_excel(filtered_data, contract_type=contract_type, fmt=fmt)
+
+        if not file_buffer:
+            await callback.answer("Маълумот йўқ", show_alert=True)
+            return
+
+        file = BufferedInputFile(
+            file_buffer.getvalue(),
+            filename=export_filename("contracts", fmt)
+        )
+
+        await callback.message.answer_document(
+            document=file
+        )
 
-    file_buffer = await contracts_to_excel(filtered_data, contract_type=contract_type)
+        await callback.answer()
 
-    if not file_buffer:
-        await callback.answer("Маълумот йўқ", show_alert=True)
-        return
 
-    file = BufferedInputFile(
-        file_buffer.getvalue(),
-        filename="contracts.xlsx"
+async def get_typed_contracts_summaries() -> dict[str, list[dict]]:
+    # All three types are fetched concurrently; any failure aborts the whole view
+    # rather than rendering "all" totals from a partial set of types.
+    return await gather_bounded(
+        {contract_key: partial(get_contracts_summary, contract_type=contract_key) for contract_key in CONTRACT_TYPES}
     )
 
-    await callback.message.answer_document(
-        document=file
-    )
 
-    await callback.answer()
+async def _load_contracts_data(contract_type: str):
+    if contract_type == CONTRACT_TYPE_ALL:
+        typed_groups = await gather_bounded(
+            {
+                contract_key: partial(group_contract_records, iter_contracts_summary(contract_key))
+                for contract_key in CONTRACT_TYPES
+            }
+        )
+        return aggregate_all_contract_types(typed_groups)
 
+    return aggregate_single_contract_type(await group_contract_records(iter_contracts_summary(contract_type)))
 
-async def get_contracts_data(contract_type: str):
-    if contract_type == CONTRACT_TYPE_ALL:
-        typed_data = {}
-        for contract_key in ("futures", "forward", "storage"):
-            typed_data[contract_key] = await get_contracts_summary(contract_type=contract_key)
-        return aggregate_all_contract_types(typed_data)
 
-    data = await get_contracts_summary(contract_type=contract_type)
-    return aggregate_single_contract_type(data)
+async def get_contracts_data(contract_type: str):
+    # Summaries are streamed and folded per farmer, so only the aggregate is kept.
+    return await _contracts_data.get_or_load(
+        contract_type,
+        partial(_load_contracts_data, contract_type),
+        ttl=CONTRACTS_DATA_TTL,
+    )
 
 
 async def get_contracts_excel_data(contract_type: str):
@@ -202,9 +262,9 @@ async def get_contracts_excel_data(contract_type: str):
         return [{**item, "contract_type": contract_type} for item in data]
 
     export_data = []
-    for contract_key in ("futures", "forward", "storage"):
-        typed_data = await get_contracts_summary(contract_type=contract_key)
-        export_data.extend({**item, "contract_type": contract_key} for item in typed_data)
+    typed_data = await get_typed_contracts_summaries()
+    for contract_key, rows in typed_data.items():
+        export_data.extend({**item, "contract_type": contract_key} for item in rows)
 
     return export_data
 
@@ -233,58 +293,61 @@ def get_district_by_index(districts: list[str], district_index: int) -> str:
     return districts[district_pos]
 
 
-def aggregate_single_contract_type(data: list[dict]) -> list[dict]:
+def _add_contract_record(grouped: dict[Hashable, dict], item: dict):
+    farmer_id = item.get("id")
+    district = item.get("district") or "-"
+    massive = item.get("massive") or "-"
+    farmer_name = (item.get("farmer_name") or item.get("name") or "-").strip() or "-"
+    key = farmer_id if farmer_id is not None else (district, massive, farmer_name)
+
+    row = grouped.setdefault(
+        key,
+        {
+            "district": district,
+            "massive": massive,
+            "farmer_name": farmer_name,
+            "quantity": 0.0,
+        },
+    )
+    row["quantity"] += to_float(item.get("quantity"))
+
+
+async def group_contract_records(records: AsyncIterable[dict]) -> dict[Hashable, dict]:
     grouped = {}
+    async for item in records:
+        _add_contract_record(grouped, item)
+    return grouped
 
-    for item in data:
-        farmer_id = item.get("id")
-        district = item.get("district") or "-"
-        massive = item.get("massive") or "-"
-        farmer_name = (item.get("farmer_name") or item.get("name") or "-").strip() or "-"
-        key = farmer_id if farmer_id is not None else (district, massive, farmer_name)
-
-        row = grouped.setdefault(
-            key,
-            {
-                "district": district,
-                "massive": massive,
-                "farmer_name": farmer_name,
-                "quantity": 0.0,
-            },
-        )
-        row["quantity"] += to_float(item.get("quantity"))
 
-    return sorted(grouped.values(), key=lambda row: (row["district"], row["massive"], row["farmer_name"]))
+def _sort_contract_rows(rows) -> list[dict]:
+    return sorted(rows, key=lambda row: (row["district"], row["massive"], row["farmer_name"]))
 
 
-def aggregate_all_contract_types(typed_data: dict[str, list[dict]]) -> list[dict]:
-    grouped = {}
+def aggregate_single_contract_type(grouped: dict[Hashable, dict]) -> list[dict]:
+    return _sort_contract_rows(grouped.values())
 
-    for contract_type, rows in typed_data.items():
-        for item in rows:
-            farmer_id = item.get("id")
-            district = item.get("district") or "-"
-            massive = item.get("massive") or "-"
-            farmer_name = (item.get("farmer_name") or item.get("name") or "-").strip() or "-"
-            key = farmer_id if farmer_id is not None else (district, massive, farmer_name)
 
+def aggregate_all_contract_types(typed_groups: Mapping[str, dict[Hashable, dict]]) -> list[dict]:
+    grouped = {}
+
+    for contract_type, typed_rows in typed_groups.items():
+        for key, typed_row in typed_rows.items():
             row = grouped.setdefault(
                 key,
                 {
-                    "district": district,
-                    "massive": massive,
-                    "farmer_name": farmer_name,
+                    "district": typed_row["district"],
+                    "massive": typed_row["massive"],
+                    "farmer_name": typed_row["farmer_name"],
                     "futures": 0.0,
                     "forward": 0.0,
                     "storage": 0.0,
                     "total": 0.0,
                 },
             )
-            quantity = to_float(item.get("quantity"))
-            row[contract_type] += quantity
-            row["total"] += quantity
+            row[contract_type] += typed_row["quantity"]
+            row["total"] += typed_row["quantity"]
 
-    return sorted(grouped.values(), key=lambda row: (row["district"], row["massive"], row["farmer_name"]))
+    return _sort_contract_rows(grouped.values())
 
 
 def build_all_contracts_totals(data: list[dict]) -> dict[str, float]:
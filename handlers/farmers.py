@@ -1,18 +1,26 @@
+from functools import partial
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
 
 from services.api_client import get_farmers
-from excel_export import farmers_to_excel
+from excel_export import export_filename, export_format, export_queue_slot, farmers_to_excel
 from keyboards import farmers_filter_keyboard, farmers_pagination_keyboard
 from middlewares.access import access_required
+from services.cache import TTLCache
 from services.pagination import paginate_data
-from services.table_image import build_table_image, send_or_edit_table_image
+from services.prefetch import cancel_prefetch, schedule_prefetch
+from services.snapshot import get_snapshot, invalidate_snapshots
+from services.table_image import render_table_image, send_or_edit_table_image
 
 router = Router()
 PER_PAGE = 15
 COTTON_PRICE = 7862
 PICKING_RATE = 2000
 FARMER_NAME_MAX_LENGTH = 22
+SORTED_FARMERS_TTL = 60
+
+_sorted_farmers = TTLCache(max_size=1)
 
 
 def _format_amount(value) -> str:
@@ -80,6 +88,8 @@ def _rows_with_dynamic_products(data: list[dict], start_index: int):
 @router.message(F.text == "📋 Фермер Баланс")
 @access_required
 async def farmers_handler(message: Message):
+    cancel_prefetch(message.chat.id)
+    invalidate_snapshots(message.chat.id, "farmers")
     data = await get_farmers()
     districts = extract_districts(data)
     await message.answer("Туманни танланг 👇", reply_markup=farmers_filter_keyboard(districts))
@@ -96,6 +106,7 @@ async def farmers_pagination(callback: CallbackQuery):
 @router.callback_query(F.data == "farmers_back_to_filters")
 @access_required
 async def farmers_back_to_filters(callback: CallbackQuery):
+    cancel_prefetch(callback.message.chat.id)
     data = await get_farmers()
     districts = extract_districts(data)
 
@@ -116,11 +127,41 @@ async def farmers_back_to_filters(callback: CallbackQuery):
     await callback.answer()
 
 
-async def send_page(target, page, district_index, edit):
-    data = await get_farmers()
+async def _load_sorted_farmers() -> list[dict]:
+    return sort_farmers(await get_farmers())
+
+
+async def get_sorted_farmers() -> list[dict]:
+    # One sorted list shared by every chat; "all" snapshots keep it by reference
+    # and district filters preserve its order.
+    return await _sorted_farmers.get_or_load("farmers", _load_sorted_farmers, ttl=SORTED_FARMERS_TTL)
+
+
+async def _build_snapshot(district_index):
+    data = await get_sorted_farmers()
     districts = extract_districts(data)
     district = get_district_by_index(districts, district_index)
-    filtered_data = sort_farmers(filter_by_district(data, district))
+    filtered_data = filter_by_district(data, district)
+
+    product_totals: dict[str, float] = {}
+    for item in filtered_data:
+        for product_name, value in (item.get("product_totals") or {}).items():
+            product_totals[product_name] = product_totals.get(product_name, 0.0) + float(value or 0)
+
+    return {
+        "district": district,
+        "rows": filtered_data,
+        "product_totals": product_totals,
+        "futures_quantity_total": sum(_to_float(item.get("futures_quantity")) for item in filtered_data),
+        "futures_amount_total": sum(_to_float(item.get("futures_amount")) for item in filtered_data),
+        "grand_total": sum(_to_float(item.get("farmer_total_amount")) for item in filtered_data),
+    }
+
+
+async def build_page(owner_id, page, district_index):
+    snapshot = await get_snapshot(owner_id, "farmers", (district_index,), partial(_build_snapshot, district_index))
+    district = snapshot["district"]
+    filtered_data = snapshot["rows"]
     page_data, start, end = paginate_data(filtered_data, page, PER_PAGE)
 
     district_title = "Умумий" if district == "all" else district
@@ -155,14 +196,13 @@ async def send_page(target, page, district_index, edit):
         "center",
     ]
 
-    totals_by_product = []
-    for product_name in product_names:
-        total_value = sum(float((item.get("product_totals") or {}).get(product_name) or 0) for item in filtered_data)
-        totals_by_product.append(_format_amount(total_value))
+    totals_by_product = [
+        _format_amount(snapshot["product_totals"].get(product_name, 0.0)) for product_name in product_names
+    ]
 
-    futures_quantity_total = sum(_to_float(item.get("futures_quantity")) for item in filtered_data)
-    futures_amount_total = sum(_to_float(item.get("futures_amount")) for item in filtered_data)
-    grand_total = sum(_to_float(item.get("farmer_total_amount")) for item in filtered_data)
+    futures_quantity_total = snapshot["futures_quantity_total"]
+    futures_amount_total = snapshot["futures_amount_total"]
+    grand_total = snapshot["grand_total"]
     total_picking_fee = futures_quantity_total * PICKING_RATE
     total_for_analysis = grand_total + total_picking_fee
     total_advance_percent = (total_for_analysis / futures_amount_total * 100) if futures_amount_total > 0 else 0
@@ -184,7 +224,7 @@ async def send_page(target, page, district_index, edit):
         ]
     )
 
-    image_bytes = build_table_image(
+    image_bytes = await render_table_image(
         title="📋 Фермер Баланс",
         subtitle=f"Туман: {district_title}",
         top_note="Минг сўмда",
@@ -202,35 +242,46 @@ async def send_page(target, page, district_index, edit):
         min_rows=PER_PAGE + 1,
     )
 
-    keyboard = farmers_pagination_keyboard(page, end < len(filtered_data), district_index)
+    return image_bytes, end < len(filtered_data)
+
+
+async def send_page(target, page, district_index, edit):
+    image_bytes, has_next = await build_page(target.chat.id, page, district_index)
+    keyboard = farmers_pagination_keyboard(page, has_next, district_index)
     await send_or_edit_table_image(target, image_bytes, keyboard, edit)
 
+    if has_next:
+        schedule_prefetch(target.chat.id, partial(build_page, target.chat.id, page + 1, district_index))
+
 
 @router.callback_query(F.data.startswith("farmers_export_excel:"))
 @access_required
 async def farmers_excel(callback: CallbackQuery):
-    district_index = int(callback.data.split(":", 1)[1])
-    data = await get_farmers()
-    districts = extract_districts(data)
-    district = get_district_by_index(districts, district_index)
-    filtered_data = sort_farmers(filter_by_district(data, district))
-
-    file_buffer = await farmers_to_excel(filtered_data)
-
-    if not file_buffer:
-        await callback.answer("Маълумот йўқ", show_alert=True)
-        return
-
-    file = BufferedInputFile(
-        file_buffer.getvalue(),
-        filename="farmers.xlsx"
-    )
+    async with export_queue_slot(callback.message):
+        _, district_index, *options = callback.data.split(":")
+        district_index = int(district_index)
+        fmt = export_format(*options[:1])
+        data = await get_sorted_farmers()
+        districts = extract_districts(data)
+        district = get_district_by_index(districts, district_index)
+        filtered_data = filter_by_district(data, district)
+
+        file_buffer = await farmers_to_excel(filtered_data, fmt=fmt)
+
+        if not file_buffer:
+            await callback.answer("Маълумот йўқ", show_alert=True)
+            return
+
+        file = BufferedInputFile(
+            file_buffer.getvalue(),
+            filename=export_filename("farmers", fmt)
+        )
 
-    await callback.message.answer_document(
-        document=file
-    )
+        await callback.message.answer_document(
+            document=file
+        )
 
-    await callback.answer()
+        await callback.answer()
 
 
 def extract_districts(data: list[dict]) -> list[str]:
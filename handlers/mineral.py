@@ -1,10 +1,32 @@
+import logging
+from functools import partial
+from typing import AsyncIterable
+
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
-from aiogram.types import BufferedInputFile, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import (
+    BufferedInputFile,
+    CallbackQuery,
+    FSInputFile,
+    InlineKeyboardMarkup,
+    Message,
+)
 from datetime import date, datetime
-
-from excel_export import warehouse_expenses_to_excel, warehouse_receipts_to_excel, warehouse_summary_to_excel
+from pathlib import Path
+
+from excel_export import (
+    EXPORT_DEFAULT_FORMAT,
+    EXPORT_SPLIT_ROWS,
+    export_filename,
+    export_format,
+    export_queue_slot,
+    warehouse_expenses_to_excel,
+    warehouse_movements_archive,
+    warehouse_receipts_to_excel,
+    warehouse_summary_to_excel,
+)
 from keyboards import (
+    export_buttons,
     warehouse_expense_districts_inline_keyboard,
     warehouse_movement_menu,
     warehouse_menu,
@@ -13,16 +35,25 @@ from keyboards import (
     warehouse_products_inline_keyboard,
 )
 from middlewares.access import access_required
-from services.table_image import build_table_image, send_or_edit_table_image
+from services.concurrency import gather_bounded
+from services.prefetch import cancel_prefetch, schedule_prefetch
+from services.snapshot import get_snapshot, invalidate_snapshots
+from services.table_image import render_table_image, send_or_edit_table_image
+from services.timing import log_timings, stage_timer, timed
 from services.api_client import (
     get_warehouse_expense_districts,
     get_warehouse_movements,
+    get_warehouse_movements_page,
+    warehouse_movements_unpaged,
     get_warehouse_products,
     get_warehouse_summary,
     get_warehouse_totals_by_filters,
     get_warehouses,
+    iter_warehouse_movements,
 )
 
+logger = logging.getLogger(__name__)
+
 router = Router()
 PER_PAGE = 10
 REPORT_PER_PAGE = 6
@@ -100,14 +131,12 @@ def _date_sort_key(value):
         return datetime.min
 
 
-def _date_rank(value) -> int:
-    parsed = _date_sort_key(value)
-    return (
-        parsed.toordinal() * 86400
-        + parsed.hour * 3600
-        + parsed.minute * 60
-        + parsed.second
-    )
+def _sorted_by_date_desc(items: list[dict]) -> list[dict]:
+    # Already-ordered (cached, shared) lists are kept by reference instead of copied.
+    keys = [_date_sort_key(item.get("date")) for item in items]
+    if all(current >= following for current, following in zip(keys, keys[1:])):
+        return items
+    return [items[index] for index in sorted(range(len(items)), key=keys.__getitem__, reverse=True)]
 
 
 def _format_number_with_spaces(value, digits: int = 0) -> str:
@@ -115,11 +144,12 @@ def _format_number_with_spaces(value, digits: int = 0) -> str:
     return formatted.replace(",", " ")
 
 
-def _report_rows_by_district(items: list[dict]) -> list[dict]:
+async def _report_rows_by_district(records: AsyncIterable[dict]) -> list[dict]:
+    # Folds movements as they are decoded instead of holding the whole season in memory.
     today_key = date.today().strftime("%Y-%m-%d")
     district_totals: dict[str, dict] = {}
 
-    for item in items:
+    async for item in records:
         district_name = (item.get("district_name") or "-").strip() or "-"
         quantity = float(item.get("quantity") or 0)
         record = district_totals.setdefault(
@@ -134,50 +164,6 @@ def _report_rows_by_district(items: list[dict]) -> list[dict]:
     return sorted(district_totals.values(), key=lambda row: row["district_name"])
 
 
-def _aggregate_expense_rows_by_farmer(items: list[dict]) -> list[dict]:
-    grouped: dict[tuple[str, str, str, str, str], dict] = {}
-
-    for item in items:
-        date_key = _date_key(item.get("date"))
-        date_text = _format_date_ddmmyyyy(item.get("date"))
-        district_name = (item.get("district_name") or "-").strip() or "-"
-        massive_name = (item.get("massive_name") or "-").strip() or "-"
-        farmer_name = (item.get("farmer_name") or "-").strip() or "-"
-        product_name = (item.get("product_name") or "-").strip() or "-"
-
-        key = (date_key, district_name, massive_name, farmer_name, product_name)
-        quantity = float(item.get("quantity") or 0)
-
-        row = grouped.setdefault(
-            key,
-            {
-                "date_key": date_key,
-                "date": date_text,
-                "district_name": district_name,
-                "massive_name": massive_name,
-                "farmer_name": farmer_name,
-                "product_name": product_name,
-                "quantity": 0.0,
-                "maydon": float(item.get("maydon") or 0),
-                "quantity_per_area": 0.0,
-            },
-        )
-        row["quantity"] += quantity
-        row["maydon"] = max(row["maydon"], float(item.get("maydon") or 0))
-        row["quantity_per_area"] = row["quantity"] / row["maydon"] if row["maydon"] > 0 else 0.0
-
-    return sorted(
-        grouped.values(),
-        key=lambda row: (
-            -_date_rank(row.get("date_key")),
-            row["district_name"],
-            row["massive_name"],
-            row["farmer_name"],
-            row["product_name"],
-        ),
-    )
-
-
 async def _warehouse_map():
     warehouses = await get_warehouses()
     return {
@@ -202,7 +188,7 @@ async def _send_total_warehouse_summary(message: Message):
         return
 
     columns, column_widths, column_alignments, table_rows, header_groups = _warehouse_summary_table_config(summary)
-    image_bytes = build_table_image(
+    image_bytes = await render_table_image(
         title="🏬 Жами омборлар ҳисоботи",
         columns=columns,
         column_widths=column_widths,
@@ -212,18 +198,12 @@ async def _send_total_warehouse_summary(message: Message):
         row_span_columns=2,
         min_rows=len(table_rows),
     )
-    await message.answer_photo(
-        photo=BufferedInputFile(image_bytes, filename="warehouse_summary.png"),
-        reply_markup=InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="📥 Excel",
-                        callback_data="warehouse_export_total_summary",
-                    )
-                ]
-            ]
-        ),
+    await send_or_edit_table_image(
+        message,
+        image_bytes,
+        InlineKeyboardMarkup(inline_keyboard=[export_buttons("warehouse_export_total_summary")]),
+        edit=False,
+        filename="warehouse_summary.png",
     )
 
 
@@ -283,23 +263,26 @@ def _warehouse_summary_table_config(summary: dict) -> tuple[list[str], list[int]
     return columns, column_widths, column_alignments, table_rows, header_groups
 
 
-@router.callback_query(F.data == "warehouse_export_total_summary")
+@router.callback_query(F.data.startswith("warehouse_export_total_summary"))
 @access_required
 async def warehouse_export_total_summary_handler(callback: CallbackQuery):
-    summary = await get_warehouse_summary()
-    file_buffer = await warehouse_summary_to_excel(summary)
-    if not file_buffer:
-        await callback.answer("Маълумот топилмади", show_alert=True)
-        return
+    async with export_queue_slot(callback.message):
+        _, *options = callback.data.split(":")
+        fmt = export_format(*options[:1])
+        summary = await get_warehouse_summary()
+        file_buffer = await warehouse_summary_to_excel(summary, fmt=fmt)
+        if not file_buffer:
+            await callback.answer("Маълумот топилмади", show_alert=True)
+            return
 
-    await callback.message.answer_document(
-        document=BufferedInputFile(
-            file_buffer.getvalue(),
-            filename="warehouse_total_summary.xlsx",
-        ),
-        caption="📊 Жами омборлар своди (Excel)",
-    )
-    await callback.answer()
+        await callback.message.answer_document(
+            document=BufferedInputFile(
+                file_buffer.getvalue(),
+                filename=export_filename("warehouse_total_summary", fmt),
+            ),
+            caption=f"📊 Жами омборлар своди ({'Excel' if fmt == 'xlsx' else fmt.upper()})",
+        )
+        await callback.answer()
 
 
 @router.message(F.text.in_({"🌾 Минерал ўғит", "🏬 Омбор"}))
@@ -496,6 +479,7 @@ async def warehouse_back_to_districts_handler(callback: CallbackQuery):
 @access_required
 async def warehouse_back_to_products_handler(callback: CallbackQuery):
     await callback.answer()
+    cancel_prefetch(callback.message.chat.id)
     _, warehouse_id, movement, district_id, section = callback.data.split(":", maxsplit=4)
     warehouse_id = int(warehouse_id)
     district_id = int(district_id)
@@ -528,6 +512,8 @@ async def warehouse_product_handler(callback: CallbackQuery):
         actual_movement = "report"
         district_id = int(movement.removeprefix("report_d"))
 
+    cancel_prefetch(callback.message.chat.id)
+    invalidate_snapshots(callback.message.chat.id, "warehouse_movements")
     await _send_warehouse_movements_page(
         message=callback.message,
         warehouse_id=warehouse_id,
@@ -553,43 +539,145 @@ async def warehouse_movements_page_handler(callback: CallbackQuery):
     )
 
 
-async def _send_warehouse_movements_page(
-    message,
+async def _build_movements_snapshot(
     warehouse_id: int,
     movement: str,
     product_id: int,
     district_id: int,
-    page: int,
+    timings: dict[str, float],
 ):
-    totals = await get_warehouse_totals_by_filters(
-        warehouse_id=warehouse_id,
-        product_id=product_id,
-        district_id=None if district_id == 0 else district_id,
-    )
-    movements = await get_warehouse_movements(
-        movement=movement,
-        warehouse_id=warehouse_id,
-        product_id=product_id,
-        district_id=None if district_id == 0 else district_id,
-    )
-    movements = sorted(movements, key=lambda item: _date_sort_key(item.get("date")), reverse=True)
-    warehouse_map = await _warehouse_map()
-    warehouse_name = _warehouse_display_name(warehouse_id, warehouse_map)
+    district_filter = None if district_id == 0 else district_id
+    calls = {
+        "totals": timed(
+            timings,
+            "totals",
+            partial(
+                get_warehouse_totals_by_filters,
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                district_id=district_filter,
+            ),
+        ),
+        "warehouse_map": timed(timings, "warehouse_map", _warehouse_map),
+        "products": timed(
+            timings,
+            "products",
+            partial(
+                get_warehouse_products,
+                warehouse_id=warehouse_id,
+                movement="out" if movement == "report" else movement,
+                district_id=district_filter,
+            ),
+        ),
+    }
+    if movement != "report" and warehouse_movements_unpaged():
+        # The backend does not paginate movements, so the whole list is kept here,
+        # sorted once, and page turns only slice it.
+        calls["movements"] = timed(
+            timings,
+            "movements",
+            partial(
+                get_warehouse_movements,
+                movement=movement,
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                district_id=district_filter,
+            ),
+        )
+    if movement == "report":
+        # The district report aggregates every movement; in/out pages are fetched one page at a time.
+        calls["report_rows"] = timed(
+            timings,
+            "movements",
+            partial(
+                _report_rows_by_district,
+                iter_warehouse_movements(
+                    movement=movement,
+                    warehouse_id=warehouse_id,
+                    product_id=product_id,
+                    district_id=district_filter,
+                ),
+            ),
+        )
 
-    products = await get_warehouse_products(
-        warehouse_id=warehouse_id,
-        movement="out" if movement == "report" else movement,
-        district_id=None if district_id == 0 else district_id,
-    )
+    fetched = await gather_bounded(calls)
     product_name = next(
-        (item.get("product_name") for item in products if int(item.get("product_id", 0)) == product_id),
+        (item.get("product_name") for item in fetched["products"] if int(item.get("product_id", 0)) == product_id),
         "Маҳсулот",
     )
+    snapshot = {
+        "totals": fetched["totals"],
+        "warehouse_name": _warehouse_display_name(warehouse_id, fetched["warehouse_map"]),
+        "product_name": product_name,
+    }
+    if "movements" in fetched:
+        snapshot["movements"] = _sorted_by_date_desc(fetched["movements"] or [])
 
+    if movement == "report":
+        report_rows = fetched["report_rows"]
+        snapshot["report_rows"] = report_rows
+        snapshot["total_today_quantity"] = sum(float(item.get("today_quantity") or 0) for item in report_rows)
+        snapshot["total_quantity"] = sum(float(item.get("total_quantity") or 0) for item in report_rows)
+
+    return snapshot
+
+
+async def _build_warehouse_movements_page(
+    owner_id: int,
+    warehouse_id: int,
+    movement: str,
+    product_id: int,
+    district_id: int,
+    page: int,
+    timings: dict[str, float],
+):
     page_size = REPORT_PER_PAGE if movement == "report" else PER_PAGE
     start = (page - 1) * page_size
     end = start + page_size
-    page_items = movements[start:end]
+
+    load_snapshot = timed(
+        timings,
+        "snapshot",
+        partial(
+            get_snapshot,
+            owner_id,
+            "warehouse_movements",
+            (warehouse_id, movement, product_id, district_id),
+            partial(_build_movements_snapshot, warehouse_id, movement, product_id, district_id, timings),
+        ),
+    )
+    calls = {"snapshot": load_snapshot}
+    if movement != "report" and not warehouse_movements_unpaged():
+        calls["page"] = timed(
+            timings,
+            "movements",
+            partial(
+                get_warehouse_movements_page,
+                movement=movement,
+                page=page,
+                page_size=page_size,
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                district_id=None if district_id == 0 else district_id,
+                ordering="-date",
+                order_keys={"date": _date_sort_key},
+            ),
+        )
+
+    fetched = await gather_bounded(calls)
+    snapshot = fetched["snapshot"]
+    if movement != "report" and "movements" not in snapshot and warehouse_movements_unpaged():
+        # Built before the backend was found not to paginate: rebuild it with the sorted list.
+        invalidate_snapshots(owner_id, "warehouse_movements")
+        snapshot = await load_snapshot()
+    totals = snapshot["totals"]
+    warehouse_name = snapshot["warehouse_name"]
+    product_name = snapshot["product_name"]
+    if "movements" in snapshot:
+        movements_page = {"results": snapshot["movements"][start:end], "count": len(snapshot["movements"])}
+    else:
+        movements_page = fetched.get("page") or {"results": [], "count": 0}
+    page_items = movements_page["results"]
 
     subtitle = (
         f"Омбор: {warehouse_name}  |  Маҳсулот: {product_name}"[:140]
@@ -623,7 +711,6 @@ async def _send_warehouse_movements_page(
         ]
         column_alignments = ["center", "center", "center", "left", "center", "center", "center", "left"]
     elif movement == "out":
-        page_items = movements[start:end]
         table_title = "📤 Чиқим деталлари"
         include_warehouse_name = warehouse_id == TOTAL_WAREHOUSE_ID
         columns = ["№", "Сана", "Туман", "Массив", "Фермер номи", "Юк-№", "Маҳсулот", "Миқдори"]
@@ -650,10 +737,10 @@ async def _send_warehouse_movements_page(
             for index, item in enumerate(page_items, start=start + 1)
         ]
     else:
-        report_rows = _report_rows_by_district(movements)
+        report_rows = snapshot["report_rows"]
         page_items = report_rows[start:end]
-        total_today_quantity = sum(float(item.get("today_quantity") or 0) for item in report_rows)
-        total_quantity = sum(float(item.get("total_quantity") or 0) for item in report_rows)
+        total_today_quantity = snapshot["total_today_quantity"]
+        total_quantity = snapshot["total_quantity"]
 
         table_title = "Свод деталлари"
         columns = ["№", "Туман", "Бир кунда ", "Мавсумда"]
@@ -683,23 +770,45 @@ async def _send_warehouse_movements_page(
 
     top_note = f"Сана: {date.today().strftime('%d.%m.%Y')}" if movement == "report" else None
 
-    image_bytes = build_table_image(
-        title=table_title,
-        subtitle=subtitle,
-        subtitle_bold=True,
-        subtitle_color="#0b1f44",
-        subtitle_alignment="left",
-        top_note=top_note,
-        top_note_alignment="left",
-        top_note_right_padding=70,
-        top_note_bold=True,
-        top_note_color="#d62828",
-        columns=columns,
-        column_widths=column_widths,
-        column_alignments=column_alignments,
-        rows=rows,
-        min_rows=page_size,
-        footer_lines=footer_lines,
+    with stage_timer(timings, "render"):
+        image_bytes = await render_table_image(
+            title=table_title,
+            subtitle=subtitle,
+            subtitle_bold=True,
+            subtitle_color="#0b1f44",
+            subtitle_alignment="left",
+            top_note=top_note,
+            top_note_alignment="left",
+            top_note_right_padding=70,
+            top_note_bold=True,
+            top_note_color="#d62828",
+            columns=columns,
+            column_widths=column_widths,
+            column_alignments=column_alignments,
+            rows=rows,
+            min_rows=page_size,
+            footer_lines=footer_lines,
+        )
+
+    has_next = end < (
+        len(report_rows)
+        if movement == "report"
+        else movements_page["count"]
+    )
+    return image_bytes, has_next
+
+
+async def _send_warehouse_movements_page(
+    message,
+    warehouse_id: int,
+    movement: str,
+    product_id: int,
+    district_id: int,
+    page: int,
+):
+    timings: dict[str, float] = {}
+    image_bytes, has_next = await _build_warehouse_movements_page(
+        message.chat.id, warehouse_id, movement, product_id, district_id, page, timings
     )
 
     section = "report" if movement == "report" else movement
@@ -711,14 +820,27 @@ async def _send_warehouse_movements_page(
         product_id=product_id,
         district_id=district_id,
         page=page,
-        has_next=end < (
-            len(report_rows)
-            if movement == "report"
-            else len(movements)
-        ),
+        has_next=has_next,
         back_callback=back_callback,
     )
-    await send_or_edit_table_image(message, image_bytes, keyboard, edit=True)
+    with stage_timer(timings, "send"):
+        await send_or_edit_table_image(message, image_bytes, keyboard, edit=True)
+    log_timings(logger, "warehouse_movements_page", timings)
+
+    if has_next:
+        schedule_prefetch(
+            message.chat.id,
+            partial(
+                _build_warehouse_movements_page,
+                message.chat.id,
+                warehouse_id,
+                movement,
+                product_id,
+                district_id,
+                page + 1,
+                {},
+            ),
+        )
 
 
 async def _send_warehouse_products_page(message, warehouse_id: int, movement: str, district_id: int, warehouse_name: str):
@@ -767,31 +889,48 @@ async def _send_warehouse_products_page(message, warehouse_id: int, movement: st
     )
 
 
-@router.callback_query(F.data.startswith("warehouse_export_filtered:"))
-@access_required
-async def warehouse_export_filtered_handler(callback: CallbackQuery):
-    _, warehouse_id, movement, product_id, district_id = callback.data.split(":", maxsplit=4)
+async def _send_archive_parts(message, parts: list[Path], movement: str):
+    stem = "warehouse_receipts" if movement == "in" else "warehouse_expenses"
+    try:
+        for number, path in enumerate(parts, start=1):
+            filename = f"{stem}.zip" if len(parts) == 1 else f"{stem}_{number}.zip"
+            # Sent straight from disk in chunks; the archive is never loaded into memory.
+            await message.answer_document(
+                document=FSInputFile(path, filename=filename),
+                caption=f"{number}/{len(parts)}" if len(parts) > 1 else None,
+            )
+    finally:
+        for path in parts:
+            path.unlink(missing_ok=True)
 
-    actual_movement = movement
-    data = await get_warehouse_movements(
-        movement=actual_movement,
-        warehouse_id=int(warehouse_id),
-        product_id=int(product_id),
-        district_id=None if int(district_id) == 0 else int(district_id),
-    )
 
-    if movement == "in":
-        file_buffer = await warehouse_receipts_to_excel(data)
-        filename = "warehouse_receipts.xlsx"
-    elif movement == "report":
-        file_buffer = await warehouse_expenses_to_excel(_report_rows_by_district(data), mode="report")
-        filename = "warehouse_report.xlsx"
+async def _send_movements_export(
+    callback: CallbackQuery,
+    movement_filters: dict,
+    include_warehouse_name: bool,
+    fmt: str = EXPORT_DEFAULT_FORMAT,
+):
+    movement = movement_filters["movement"]
+
+    if movement == "report":
+        report_rows = await _report_rows_by_district(iter_warehouse_movements(**movement_filters))
+        file_buffer = await warehouse_expenses_to_excel(report_rows, mode="report", fmt=fmt)
+        filename = export_filename("warehouse_report", fmt)
     else:
-        file_buffer = await warehouse_expenses_to_excel(
-            data,
-            include_warehouse_name=int(warehouse_id) == TOTAL_WAREHOUSE_ID,
-        )
-        filename = "warehouse_expenses.xlsx"
+        data = await get_warehouse_movements(**movement_filters)
+        # Only workbooks are split; CSV and Parquet are streamed/compressed and stay one file.
+        if fmt == "xlsx" and len(data) > EXPORT_SPLIT_ROWS:
+            parts = await warehouse_movements_archive(data, movement, include_warehouse_name)
+            await _send_archive_parts(callback.message, parts, movement)
+            await callback.answer()
+            return
+
+        if movement == "in":
+            file_buffer = await warehouse_receipts_to_excel(data, fmt=fmt)
+            filename = export_filename("warehouse_receipts", fmt)
+        else:
+            file_buffer = await warehouse_expenses_to_excel(data, include_warehouse_name=include_warehouse_name, fmt=fmt)
+            filename = export_filename("warehouse_expenses", fmt)
 
     if not file_buffer:
         await callback.answer("Маълумот йўқ", show_alert=True)
@@ -802,43 +941,49 @@ async def warehouse_export_filtered_handler(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("warehouse_export:"))
+@router.callback_query(F.data.startswith("warehouse_export_filtered:"))
 @access_required
-async def warehouse_export_handler(callback: CallbackQuery):
-    _, warehouse_id, movement = callback.data.split(":", maxsplit=2)
-    warehouse_id = int(warehouse_id)
-    district_id = None
-    actual_movement = movement
-    if movement.startswith("out_d"):
-        actual_movement = "out"
-        district_id = int(movement.removeprefix("out_d"))
-    elif movement.startswith("report_d"):
-        actual_movement = "report"
-        district_id = int(movement.removeprefix("report_d"))
+async def warehouse_export_filtered_handler(callback: CallbackQuery):
+    async with export_queue_slot(callback.message):
+        _, warehouse_id, movement, product_id, district_id, *options = callback.data.split(":")
+
+        movement_filters = {
+            "movement": movement,
+            "warehouse_id": int(warehouse_id),
+            "product_id": int(product_id),
+            "district_id": None if int(district_id) == 0 else int(district_id),
+        }
+        await _send_movements_export(
+            callback,
+            movement_filters,
+            include_warehouse_name=int(warehouse_id) == TOTAL_WAREHOUSE_ID,
+            fmt=export_format(*options[:1]),
+        )
 
-    data = await get_warehouse_movements(
-        movement=actual_movement,
-        warehouse_id=warehouse_id,
-        district_id=district_id,
-    )
 
-    if actual_movement == "in":
-        file_buffer = await warehouse_receipts_to_excel(data)
-        filename = "warehouse_receipts.xlsx"
-    elif actual_movement == "report":
-        file_buffer = await warehouse_expenses_to_excel(_report_rows_by_district(data), mode="report")
-        filename = "warehouse_report.xlsx"
-    else:
-        file_buffer = await warehouse_expenses_to_excel(
-            data,
+@router.callback_query(F.data.startswith("warehouse_export:"))
+@access_required
+async def warehouse_export_handler(callback: CallbackQuery):
+    async with export_queue_slot(callback.message):
+        _, warehouse_id, movement, *options = callback.data.split(":")
+        warehouse_id = int(warehouse_id)
+        district_id = None
+        actual_movement = movement
+        if movement.startswith("out_d"):
+            actual_movement = "out"
+            district_id = int(movement.removeprefix("out_d"))
+        elif movement.startswith("report_d"):
+            actual_movement = "report"
+            district_id = int(movement.removeprefix("report_d"))
+
+        movement_filters = {
+            "movement": actual_movement,
+            "warehouse_id": warehouse_id,
+            "district_id": district_id,
+        }
+        await _send_movements_export(
+            callback,
+            movement_filters,
             include_warehouse_name=warehouse_id == TOTAL_WAREHOUSE_ID,
+            fmt=export_format(*options[:1]),
         )
-        filename = "warehouse_expenses.xlsx"
-
-    if not file_buffer:
-        await callback.answer("Маълумот йўқ", show_alert=True)
-        return
-
-    file = BufferedInputFile(file_buffer.getvalue(), filename=filename)
-    await callback.message.answer_document(document=file)
-    await callback.answer()
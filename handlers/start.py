@@ -5,6 +5,7 @@ from aiogram.filters import CommandStart
 
 from keyboards import main_menu, farmers_menu
 from middlewares.access import access_required
+from services.prefetch import cancel_prefetch
 
 router = Router()
 
@@ -18,6 +19,7 @@ async def start_handler(message: Message):
 @router.message(F.text == "🏠 Асосий меню")
 @access_required
 async def back_to_main_menu(message: Message):
+    cancel_prefetch(message.chat.id)
     await message.answer("Асосий меню 👇", reply_markup=main_menu)
 
 
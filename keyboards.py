@@ -1,6 +1,28 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
+from excel_export import EXPORT_DEFAULT_FORMAT, EXPORT_FORMATS
+
+EXPORT_BUTTON_LABELS = {
+    "xlsx": "📥 Excel",
+    "csv": "📄 CSV",
+    "parquet": "🗃 Parquet",
+}
+
+CALLBACK_DATA_MAX_BYTES = 64
+
+
+def export_buttons(callback_data: str) -> list[InlineKeyboardButton]:
+    # Excel keeps the original callback data; other formats append their name
+    # and are left out if that would exceed Telegram's callback_data limit.
+    buttons = []
+    for fmt in EXPORT_FORMATS:
+        data = callback_data if fmt == EXPORT_DEFAULT_FORMAT else f"{callback_data}:{fmt}"
+        if fmt == EXPORT_DEFAULT_FORMAT or len(data.encode()) <= CALLBACK_DATA_MAX_BYTES:
+            buttons.append(InlineKeyboardButton(text=EXPORT_BUTTON_LABELS[fmt], callback_data=data))
+    return buttons
+
+
 main_menu = ReplyKeyboardMarkup(
     keyboard=[
         [KeyboardButton(text="📋 Фермерлар")],
@@ -109,12 +131,7 @@ def farmers_pagination_keyboard(page: int, has_next: bool, district_index: int):
             )
         )
 
-    row.append(
-        InlineKeyboardButton(
-            text="📥 Excel",
-            callback_data=f"farmers_export_excel:{district_index}"
-        )
-    )
+    row.extend(export_buttons(f"farmers_export_excel:{district_index}"))
 
     if has_next:
         row.append(
@@ -157,12 +174,7 @@ def contracts_pagination_keyboard(page: int, has_next: bool, district_index: int
             )
         )
 
-    row.append(
-        InlineKeyboardButton(
-            text="📥 Excel",
-            callback_data=f"contracts_export_excel:{contract_type}:{district_index}"
-        )
-    )
+    row.extend(export_buttons(f"contracts_export_excel:{contract_type}:{district_index}"))
 
     if has_next:
         row.append(
@@ -234,14 +246,7 @@ def warehouse_products_inline_keyboard(warehouse_id: int, movement: str, product
             ]
         )
 
-    buttons.append(
-        [
-            InlineKeyboardButton(
-                text="📥 Excel",
-                callback_data=f"warehouse_export:{warehouse_id}:{movement}"
-            )
-        ]
-    )
+    buttons.append(export_buttons(f"warehouse_export:{warehouse_id}:{movement}"))
 
     buttons.append([InlineKeyboardButton(text="⬅️ Орқага", callback_data=back_callback)])
 
@@ -270,13 +275,8 @@ def warehouse_movements_pagination_keyboard(
             )
         )
 
-    row.append(
-        InlineKeyboardButton(
-            text="📥 Excel",
-            callback_data=(
-                f"warehouse_export_filtered:{warehouse_id}:{movement}:{product_id}:{district_id}"
-            ),
-        )
+    row.extend(
+        export_buttons(f"warehouse_export_filtered:{warehouse_id}:{movement}:{product_id}:{district_id}")
     )
 
     if has_next:
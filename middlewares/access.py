@@ -1,6 +1,54 @@
-from functools import wraps
+from functools import partial, wraps
 from aiogram.types import Message, CallbackQuery
-from services.api_client import check_access, log_activity
+from services.activity_logger import activity_logger
+from services.api_client import check_access
+from services.cache import TTLCache
+
+ACCESS_ALLOW_TTL = 60
+ACCESS_DENY_TTL = 10
+ACCESS_GRACE_PERIOD = 600
+ACCESS_CACHE_SIZE = 10_000
+
+_access_decisions = TTLCache(max_size=ACCESS_CACHE_SIZE)
+_last_known_decisions = TTLCache(max_size=ACCESS_CACHE_SIZE)
+
+
+async def _load_access_decision(telegram_id: int, full_name: str) -> bool | None:
+    result = await check_access(telegram_id, full_name)
+    if result is None:
+        return None
+
+    is_allowed = bool(result.get("allowed"))
+    _last_known_decisions.set(telegram_id, is_allowed, ttl=ACCESS_GRACE_PERIOD)
+    return is_allowed
+
+
+async def is_access_allowed(telegram_id: int, full_name: str) -> bool:
+    # Concurrent first messages from one user share a single backend check.
+    is_allowed = await _access_decisions.get_or_load(
+        telegram_id,
+        partial(_load_access_decision, telegram_id, full_name),
+        ttl=lambda allowed: ACCESS_ALLOW_TTL if allowed else ACCESS_DENY_TTL,
+        should_cache=lambda allowed: allowed is not None,
+    )
+    if is_allowed is None:
+        # Backend is unreachable: keep serving the last known decision within the grace window.
+        return bool(_last_known_decisions.get(telegram_id, False))
+    return is_allowed
+
+
+def revoke_access(telegram_id: int | None = None) -> None:
+    if telegram_id is None:
+        _access_decisions.invalidate()
+        _last_known_decisions.invalidate()
+        return
+
+    _access_decisions.invalidate(lambda key: key == telegram_id)
+    _last_known_decisions.invalidate(lambda key: key == telegram_id)
+
+
+def access_cache_stats() -> dict[str, int | float]:
+    return _access_decisions.stats()
 
 
 def access_required(handler):
@@ -17,11 +65,10 @@ def access_required(handler):
         else:
             return
 
-        result = await check_access(telegram_id, full_name)
-        is_allowed = isinstance(result, dict) and bool(result.get("allowed"))
+        is_allowed = await is_access_allowed(telegram_id, full_name)
 
         if not is_allowed:
-            await log_activity(
+            activity_logger.submit(
                 telegram_id=telegram_id,
                 action_name="access_denied",
                 action_payload=getattr(event, "text", "") or getattr(event, "data", ""),
@@ -34,7 +81,7 @@ def access_required(handler):
                 await event.answer("⛔️ Рухсат йўқ", show_alert=True)
             return
 
-        await log_activity(
+        activity_logger.submit(
             telegram_id=telegram_id,
             action_name=getattr(handler, "__name__", "handler"),
             action_payload=getattr(event, "text", "") or getattr(event, "data", ""),
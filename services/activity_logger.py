@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from functools import partial
+
+from services.api_client import build_activity_payload, log_activity, log_activity_bulk
+from services.concurrency import gather_bounded
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_QUEUE_SIZE = 2000
+ACTIVITY_BATCH_SIZE = 25
+ACTIVITY_BATCH_INTERVAL = 2.0
+ACTIVITY_SEND_CONCURRENCY = 4
+ACTIVITY_SHUTDOWN_TIMEOUT = 10.0
+# Flip on once the backend exposes api_client.ACTIVITY_BULK_PATH.
+ACTIVITY_USE_BULK_ENDPOINT = False
+
+_STOP = object()
+
+
+class ActivityLogger:
+    """Fire-and-forget audit log: events are queued and posted by a background worker."""
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = ACTIVITY_QUEUE_SIZE,
+        batch_size: int = ACTIVITY_BATCH_SIZE,
+        batch_interval: float = ACTIVITY_BATCH_INTERVAL,
+        send_concurrency: int = ACTIVITY_SEND_CONCURRENCY,
+        use_bulk_endpoint: bool = ACTIVITY_USE_BULK_ENDPOINT,
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.send_concurrency = send_concurrency
+        self.use_bulk_endpoint = use_bulk_endpoint
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self.submitted = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    def submit(
+        self,
+        telegram_id: int,
+        action_name: str,
+        action_payload: str = "",
+        action_type: str = "message",
+        is_allowed: bool = True,
+    ) -> bool:
+        event = {
+            "telegram_id": telegram_id,
+            "action_name": action_name,
+            "action_payload": action_payload,
+            "action_type": action_type,
+            "is_allowed": is_allowed,
+        }
+        try:
+            self._get_queue().put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.submitted += 1
+        return True
+
+    async def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = ACTIVITY_SHUTDOWN_TIMEOUT) -> None:
+        worker, self._worker = self._worker, None
+        if worker is None or worker.done():
+            return
+
+        try:
+            await asyncio.wait_for(self._get_queue().put(_STOP), timeout)
+            await asyncio.wait_for(worker, timeout)
+        except asyncio.TimeoutError:
+            worker.cancel()
+            logger.warning("Activity logger did not flush in %.1fs, %d events lost", timeout, self._get_queue().qsize())
+
+    async def _run(self) -> None:
+        queue = self._get_queue()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            event = await queue.get()
+            if event is _STOP:
+                return
+
+            batch = [event]
+            stopping = False
+            deadline = loop.time() + self.batch_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await self._send_batch(batch)
+            if stopping:
+                return
+
+    async def _send_batch(self, batch: list[dict]) -> None:
+        try:
+            if self.use_bulk_endpoint:
+                ok = await log_activity_bulk([build_activity_payload(**event) for event in batch])
+                results = [ok] * len(batch)
+            else:
+                sent = await gather_bounded(
+                    {index: partial(log_activity, **event) for index, event in enumerate(batch)},
+                    limit=self.send_concurrency,
+                    return_exceptions=True,
+                )
+                results = [result is True for result in sent.values()]
+        except Exception:
+            logger.exception("Failed to send activity batch of %d events", len(batch))
+            results = [False] * len(batch)
+
+        delivered = sum(results)
+        self.sent += delivered
+        self.failed += len(batch) - delivered
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+activity_logger = ActivityLogger()
+
+
+async def start_activity_logger():
+    await activity_logger.start()
+
+
+async def stop_activity_logger():
+    await activity_logger.stop()
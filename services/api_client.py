@@ -1,36 +1,361 @@
 import asyncio
+import codecs
+import json
+from typing import Any, AsyncIterator, Callable
 from urllib.parse import urlencode
 
 import aiohttp
 from config import API_BASE_URL
-
-
-async def check_access(telegram_id: int, full_name: str):
-    timeout = aiohttp.ClientTimeout(total=10)
+from services import json_codec
+from services.cache import TTLCache
+
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 30
+DNS_CACHE_TTL = 300
+# aiohttp's default 5-minute total is kept for season-long downloads and exports;
+# only connecting to the backend is bounded more tightly.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=5 * 60, connect=10)
+SHORT_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+ACTIVITY_BULK_PATH = "/bot-user/activity/bulk/"
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTLS = {
+    "/farmers/": 60,
+    "/farmers/summary/": 60,
+    "/warehouse/list/": 300,
+    "/warehouse/summary/": 30,
+    # Short TTLs so a prefetched next page is still warm when the user presses ➡️.
+    "/warehouse/movements/": 20,
+    "/warehouse/totals/": 20,
+    "/warehouse/products/": 20,
+}
+
+PAGING_PROBE_TTL = 600
+
+_session: aiohttp.ClientSession | None = None
+_response_cache = TTLCache(max_size=RESPONSE_CACHE_SIZE)
+# Paths that answered a paged request with a plain list. Later pages for them
+# reuse the cached full download and are filtered and sliced locally. Probe
+# results expire, so a backend that gains paging is picked up again.
+_unpaged_paths = TTLCache(max_size=64)
+# Page size a paginating backend actually uses when it ignores "page_size".
+_backend_page_sizes = TTLCache(max_size=64)
+_json_decoder = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\r\n"
+
+
+async def start_session() -> aiohttp.ClientSession:
+    global _session
+
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=REQUEST_TIMEOUT,
+            json_serialize=json_codec.dumps,
+        )
+
+    return _session
+
+
+async def close_session():
+    global _session
+
+    session, _session = _session, None
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _build_url(path: str, params: dict | None = None) -> str:
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{API_BASE_URL}{path}{query}"
+
+
+async def _fetch_json(path: str, params: dict | None = None):
+    session = await start_session()
+    async with session.get(_build_url(path, params)) as resp:
+        return resp.status, await resp.json(loads=json_codec.loads)
+
+
+def _cache_key(path: str, params: dict | None = None):
+    return path, tuple(sorted((params or {}).items()))
+
+
+async def _get_json(path: str, params: dict | None = None):
+    ttl = RESPONSE_CACHE_TTLS.get(path)
+    if not ttl:
+        _, data = await _fetch_json(path, params)
+        return data
+
+    # Cached payloads are shared between callers and must not be mutated in place.
+    key = _cache_key(path, params)
+    _, data = await _response_cache.get_or_load(
+        key,
+        lambda: _fetch_json(path, params),
+        ttl=ttl,
+        should_cache=lambda result: result[0] == 200,
+    )
+    return data
+
+
+def _records(data) -> list:
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data.get("results") or []
+    return []
+
+
+def _split_json_array(buffer: str, started: bool, final: bool):
+    """Decode the complete top-level array items at the start of ``buffer``.
+
+    Returns ``(items, rest, started, finished)``; ``rest`` is the undecoded
+    tail to prepend to the next chunk.
+    """
+    items = []
+    pos = 0
+    length = len(buffer)
+    while True:
+        while pos < length and (buffer[pos] in _JSON_WHITESPACE or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos >= length:
+            break
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+
+        if buffer[pos] == "]":
+            return items, "", started, True
+
+        try:
+            value, end = _json_decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            break
+        # A number cut at the chunk boundary ("-0." or "12") still decodes, so
+        # only accept a value once the separator after it has arrived.
+        next_pos = end
+        while next_pos < length and buffer[next_pos] in _JSON_WHITESPACE:
+            next_pos += 1
+        if next_pos >= length or buffer[next_pos] not in ",]":
+            if final:
+                raise ValueError("Malformed JSON array")
+            break
+
+        items.append(value)
+        pos = end
+
+    if final:
+        raise ValueError("Truncated JSON array")
+    return items, buffer[pos:], started, False
+
+
+async def _iter_json_records(path: str, params: dict | None = None) -> AsyncIterator[Any]:
+    """Yield the records of a list endpoint as the response body arrives.
+
+    A response already in the response cache is replayed from memory. Streamed
+    responses are not cached, since that would mean holding the whole list.
+    """
+    cached = _response_cache.get(_cache_key(path, params)) if RESPONSE_CACHE_TTLS.get(path) else None
+    if cached is not None:
+        for record in _records(cached[1]):
+            yield record
+        return
+
+    session = await start_session()
+    async with session.get(_build_url(path, params)) as resp:
+        text = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        started = False
+
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            buffer += text.decode(chunk)
+            if not started:
+                head = buffer.lstrip(_JSON_WHITESPACE)
+                if not head:
+                    continue
+                if head[0] != "[":
+                    # Paged or error objects are small; decode them whole.
+                    buffer += text.decode(await resp.content.read(), final=True)
+                    for record in _records(json_codec.loads(buffer)):
+                        yield record
+                    return
+
+            items, buffer, started, finished = _split_json_array(buffer, started, final=False)
+            for item in items:
+                yield item
+            if finished:
+                return
+
+        items, _, _, _ = _split_json_array(buffer + text.decode(b"", final=True), started, final=True)
+        for item in items:
+            yield item
+
+
+def _order_locally(
+    rows: list[dict],
+    ordering: str,
+    order_keys: dict[str, Callable[[Any], Any]] | None = None,
+) -> list[dict]:
+    # Mirrors the backend "ordering" syntax ("-date,id"); missing values go last.
+    # A field with an entry in ``order_keys`` is sorted on key(value) instead,
+    # missing values included, so raw strings such as dates compare correctly.
+    for field in reversed(ordering.split(",")):
+        field = field.strip()
+        descending = field.startswith("-")
+        field = field.lstrip("-")
+        if not field:
+            continue
+        key = (order_keys or {}).get(field)
+        if key is not None:
+            rows = sorted(rows, key=lambda row: key(row.get(field)), reverse=descending)
+            continue
+        present = [row for row in rows if row.get(field) is not None]
+        missing = [row for row in rows if row.get(field) is None]
+        rows = sorted(present, key=lambda row: row[field], reverse=descending) + missing
+    return rows
+
+
+def _page_locally(
+    rows: list[dict],
+    page: int,
+    page_size: int,
+    ordering: str | None,
+    filters: dict,
+    order_keys: dict[str, Callable[[Any], Any]] | None = None,
+) -> dict:
+    for field, value in filters.items():
+        rows = [row for row in rows if row.get(field) == value]
+    if ordering:
+        rows = _order_locally(rows, ordering, order_keys)
+
+    start = (page - 1) * page_size
+    return {"results": rows[start:start + page_size], "count": len(rows)}
+
+
+async def _get_page(
+    path: str,
+    params: dict,
+    *,
+    page: int,
+    page_size: int,
+    ordering: str | None = None,
+    filters: dict | None = None,
+    order_keys: dict[str, Callable[[Any], Any]] | None = None,
+) -> dict:
+    """Fetch one page as {"results": [...], "count": n}.
+
+    ``filters`` are sent to the backend with the paging parameters and only
+    applied locally when the backend turns out not to paginate ``path``;
+    ``order_keys`` are likewise only used for local ordering.
+    """
+    filters = {field: value for field, value in (filters or {}).items() if value}
+
+    if not _unpaged_paths.get(path, False):
+        backend_size = _backend_page_sizes.get(path, page_size)
+        start = (page - 1) * page_size
+        first = start // backend_size + 1
+        last = (start + page_size - 1) // backend_size + 1
+
+        def paged_params(number: int) -> dict:
+            query = {**params, **filters, "page": number, "page_size": backend_size}
+            if ordering:
+                query["ordering"] = ordering
+            return query
+
+        pages = await asyncio.gather(*(_get_json(path, paged_params(number)) for number in range(first, last + 1)))
+        data = pages[0]
+        if isinstance(data, dict):
+            # Out-of-range pages come back as {"detail": ...} without results.
+            results = data.get("results") or []
+            if len(results) > backend_size:
+                # The backend ignored page_size and used its own: ask again for the
+                # pages of that size which cover the requested range.
+                _backend_page_sizes.set(path, len(results), ttl=PAGING_PROBE_TTL)
+                return await _get_page(
+                    path,
+                    params,
+                    page=page,
+                    page_size=page_size,
+                    ordering=ordering,
+                    filters=filters,
+                    order_keys=order_keys,
+                )
+
+            rows = [row for page_data in pages if isinstance(page_data, dict) for row in page_data.get("results") or []]
+            offset = start - (first - 1) * backend_size
+            return {"results": rows[offset:offset + page_size], "count": int(data.get("count") or len(results))}
+        if not isinstance(data, list):
+            return {"results": [], "count": 0}
+
+        # The backend ignored the paging parameters and sent the whole table;
+        # slice this response and skip the probe on later calls. Unfiltered, it
+        # is the same payload as the plain request, so it is cached as that too.
+        _unpaged_paths.set(path, True, ttl=PAGING_PROBE_TTL)
+        ttl = RESPONSE_CACHE_TTLS.get(path)
+        if ttl and not filters:
+            _response_cache.set(_cache_key(path, params), (200, data), ttl=ttl)
+        return _page_locally(data, page, page_size, ordering, filters, order_keys)
+
+    data = await _get_json(path, params)
+    return _page_locally(data or [], page, page_size, ordering, filters, order_keys)
+
+
+def invalidate_cache(path: str | None = None) -> int:
+    if path is None:
+        return _response_cache.invalidate()
+    return _response_cache.invalidate(lambda key: key[0] == path)
+
+
+def cache_stats() -> dict[str, int | float]:
+    return _response_cache.stats()
+
+
+async def check_access(telegram_id: int, full_name: str) -> dict | None:
+    # None means the backend could not answer (network error, timeout, 5xx),
+    # as opposed to an explicit {"allowed": False} decision.
     payload = {
         "telegram_id": telegram_id,
         "full_name": (full_name or "").strip()[:255],
     }
 
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                f"{API_BASE_URL}/bot-user/check/",
-                json=payload,
-            ) as resp:
-                if resp.status != 200:
-                    return {"allowed": False}
-
-                data = await resp.json()
-                return data if isinstance(data, dict) else {"allowed": False}
-    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        session = await start_session()
+        async with session.post(
+            _build_url("/bot-user/check/"),
+            json=payload,
+            timeout=SHORT_REQUEST_TIMEOUT,
+        ) as resp:
+            if resp.status >= 500:
+                return None
+            if resp.status != 200:
+                return {"allowed": False}
+
+            data = await resp.json(loads=json_codec.loads)
+            return data if isinstance(data, dict) else {"allowed": False}
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+    except ValueError:
         return {"allowed": False}
 
 
 async def get_farmers():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/farmers/") as resp:
-            return await resp.json()
+    return await _get_json("/farmers/")
 
 
 async def get_contracts_summary(contract_type: str | None = None):
@@ -38,41 +363,35 @@ async def get_contracts_summary(contract_type: str | None = None):
     if contract_type:
         params["contract_type"] = contract_type
 
-    query = f"?{urlencode(params)}" if params else ""
+    return await _get_json("/farmers/summary/", params)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/farmers/summary/{query}") as resp:
-            return await resp.json()
+
+def iter_contracts_summary(contract_type: str | None = None) -> AsyncIterator[dict]:
+    params = {}
+    if contract_type:
+        params["contract_type"] = contract_type
+
+    return _iter_json_records("/farmers/summary/", params)
 
 
 async def get_warehouse_totals():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/totals/") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/totals/")
 
 
 async def get_warehouse_receipts():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/receipts/") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/receipts/")
 
 
 async def get_warehouse_expenses():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/expenses/") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/expenses/")
 
 
 async def get_warehouses():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/list/") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/list/")
 
 
 async def get_warehouse_summary():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/summary/") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/summary/")
 
 
 async def get_warehouse_totals_by_filters(
@@ -88,11 +407,7 @@ async def get_warehouse_totals_by_filters(
     if district_id:
         params["district_id"] = district_id
 
-    query = f"?{urlencode(params)}" if params else ""
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/totals/{query}") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/totals/", params)
 
 
 async def get_warehouse_products(
@@ -108,19 +423,15 @@ async def get_warehouse_products(
     if district_id:
         params["district_id"] = district_id
 
-    query = f"?{urlencode(params)}" if params else ""
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/products/{query}") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/products/", params)
 
 
-async def get_warehouse_movements(
+def _movement_params(
     movement: str,
     warehouse_id: int | None = None,
     product_id: int | None = None,
     district_id: int | None = None,
-):
+) -> dict:
     params = {"movement": movement}
     if warehouse_id:
         params["warehouse_id"] = warehouse_id
@@ -128,12 +439,53 @@ async def get_warehouse_movements(
         params["product_id"] = product_id
     if district_id:
         params["district_id"] = district_id
+    return params
 
-    query = f"?{urlencode(params)}" if params else ""
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/movements/{query}") as resp:
-            return await resp.json()
+async def get_warehouse_movements(
+    movement: str,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    district_id: int | None = None,
+):
+    return await _get_json("/warehouse/movements/", _movement_params(movement, warehouse_id, product_id, district_id))
+
+
+def iter_warehouse_movements(
+    movement: str,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    district_id: int | None = None,
+) -> AsyncIterator[dict]:
+    return _iter_json_records(
+        "/warehouse/movements/",
+        _movement_params(movement, warehouse_id, product_id, district_id),
+    )
+
+
+async def get_warehouse_movements_page(
+    movement: str,
+    page: int,
+    page_size: int,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    district_id: int | None = None,
+    ordering: str | None = None,
+    order_keys: dict[str, Callable[[Any], Any]] | None = None,
+):
+    return await _get_page(
+        "/warehouse/movements/",
+        _movement_params(movement, warehouse_id, product_id, district_id),
+        page=page,
+        page_size=page_size,
+        ordering=ordering,
+        order_keys=order_keys,
+    )
+
+
+def warehouse_movements_unpaged() -> bool:
+    """True once the backend has answered a paged movements request with a plain list."""
+    return _unpaged_paths.get("/warehouse/movements/", False)
 
 
 async def get_warehouse_expense_districts(warehouse_id: int | None = None):
@@ -141,22 +493,17 @@ async def get_warehouse_expense_districts(warehouse_id: int | None = None):
     if warehouse_id:
         params["warehouse_id"] = warehouse_id
 
-    query = f"?{urlencode(params)}" if params else ""
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/expense-districts/{query}") as resp:
-            return await resp.json()
+    return await _get_json("/warehouse/expense-districts/", params)
 
 
-async def log_activity(
+def build_activity_payload(
     telegram_id: int,
     action_name: str,
     action_payload: str = "",
     action_type: str = "message",
     is_allowed: bool = True,
-):
-    timeout = aiohttp.ClientTimeout(total=10)
-    payload = {
+) -> dict:
+    return {
         "telegram_id": telegram_id,
         "action_type": action_type,
         "action_name": (action_name or "unknown")[:100],
@@ -164,12 +511,36 @@ async def log_activity(
         "is_allowed": is_allowed,
     }
 
+
+async def log_activity(
+    telegram_id: int,
+    action_name: str,
+    action_payload: str = "",
+    action_type: str = "message",
+    is_allowed: bool = True,
+):
+    payload = build_activity_payload(telegram_id, action_name, action_payload, action_type, is_allowed)
+
+    try:
+        session = await start_session()
+        async with session.post(
+            _build_url("/bot-user/activity/"),
+            json=payload,
+            timeout=SHORT_REQUEST_TIMEOUT,
+        ):
+            return True
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return False
+
+
+async def log_activity_bulk(payloads: list[dict]):
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                f"{API_BASE_URL}/bot-user/activity/",
-                json=payload,
-            ):
-                return True
+        session = await start_session()
+        async with session.post(
+            _build_url(ACTIVITY_BULK_PATH),
+            json={"events": payloads},
+            timeout=SHORT_REQUEST_TIMEOUT,
+        ) as resp:
+            return resp.status < 400
     except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
         return False
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """In-process LRU cache with per-entry TTL and single-flight loading.
+
+    With ``weigh`` and ``max_weight`` set, entries are also evicted least recently
+    used first while their summed weight (e.g. rows held) exceeds ``max_weight``.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        sweep_interval: float = 30.0,
+        *,
+        max_weight: int | None = None,
+        weigh: Callable[[Any], int] | None = None,
+    ):
+        self.max_size = max_size
+        self.sweep_interval = sweep_interval
+        self.max_weight = max_weight
+        self._weigh = weigh
+        self._weight = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        missing = object()
+        value = self._lookup(key, missing)
+        if value is missing:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def _lookup(self, key: Hashable, default: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        # Expired entries are otherwise only dropped when their own key is read again;
+        # sweeping on write keeps large payloads from outliving their TTL.
+        if now >= self._next_sweep:
+            self.purge_expired(now)
+
+        if key in self._entries:
+            self._remove(key)
+        weight = self._weigh(value) if self._weigh is not None else 0
+        self._entries[key] = (now + ttl, value, weight)
+        self._weight += weight
+        while len(self._entries) > self.max_size or (
+            self.max_weight is not None and self._weight > self.max_weight and len(self._entries) > 1
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, weight = self._entries.pop(key)
+        self._weight -= weight
+
+    def purge_expired(self, now: float | None = None) -> int:
+        now = time.monotonic() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+        keys = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in keys:
+            self._remove(key)
+        self.expirations += len(keys)
+        return len(keys)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> int:
+        if predicate is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._weight = 0
+            return removed
+
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        *,
+        ttl: float | Callable[[Any], float],
+        should_cache: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        missing = object()
+        value = self._lookup(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+
+            def _store(done: asyncio.Task):
+                self._inflight.pop(key, None)
+                if done.cancelled() or done.exception() is not None:
+                    return
+                result = done.result()
+                if should_cache is None or should_cache(result):
+                    self.set(key, result, ttl(result) if callable(ttl) else ttl)
+
+            task.add_done_callback(_store)
+
+        # Shield so that one cancelled waiter does not abort the shared load.
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "weight": self._weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Mapping, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY_LIMIT = 4
+
+
+async def gather_bounded(
+    calls: Mapping[K, Callable[[], Awaitable[T]]],
+    *,
+    limit: int = DEFAULT_CONCURRENCY_LIMIT,
+    return_exceptions: bool = False,
+) -> dict[K, T | BaseException]:
+    """Run keyed coroutine factories concurrently, at most ``limit`` at a time.
+
+    By default the first failure cancels the remaining calls and is re-raised,
+    so callers never aggregate a partial result by accident. With
+    ``return_exceptions=True`` every call runs to completion and failed keys
+    map to their exception instead.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    tasks = {key: asyncio.ensure_future(run(factory)) for key, factory in calls.items()}
+    if not tasks:
+        return {}
+
+    if return_exceptions:
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return dict(zip(tasks, results))
+
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    return dict(zip(tasks, results))
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_MAX_CONCURRENT = 8
+
+_prefetch_tasks: dict[int, asyncio.Task] = {}
+_prefetch_stats = {"scheduled": 0, "skipped": 0, "cancelled": 0, "completed": 0, "failed": 0}
+
+
+def schedule_prefetch(owner_id: int, factory: Callable[[], Awaitable[object]]) -> bool:
+    """Speculatively run ``factory`` in the background for one chat.
+
+    Each chat has at most one prefetch in flight: scheduling a new one cancels the
+    previous, and view-entry handlers cancel it when the chat moves elsewhere.
+    Prefetches share the render pool with real page views; when
+    PREFETCH_MAX_CONCURRENT chats are already prefetching the request is skipped,
+    which bounds how many pool slots speculative work can hold.
+    """
+    cancel_prefetch(owner_id)
+    if len(_prefetch_tasks) >= PREFETCH_MAX_CONCURRENT:
+        _prefetch_stats["skipped"] += 1
+        return False
+
+    task = asyncio.create_task(_run_prefetch(factory))
+    _prefetch_tasks[owner_id] = task
+    _prefetch_stats["scheduled"] += 1
+
+    def _forget(done: asyncio.Task):
+        if _prefetch_tasks.get(owner_id) is done:
+            del _prefetch_tasks[owner_id]
+
+    task.add_done_callback(_forget)
+    return True
+
+
+async def _run_prefetch(factory: Callable[[], Awaitable[object]]) -> None:
+    try:
+        await factory()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _prefetch_stats["failed"] += 1
+        logger.debug("Prefetch failed", exc_info=True)
+    else:
+        _prefetch_stats["completed"] += 1
+
+
+def cancel_prefetch(owner_id: int) -> None:
+    task = _prefetch_tasks.pop(owner_id, None)
+    if task is not None and not task.done():
+        task.cancel()
+        _prefetch_stats["cancelled"] += 1
+
+
+async def cancel_all_prefetches():
+    for owner_id in list(_prefetch_tasks):
+        cancel_prefetch(owner_id)
+
+
+def prefetch_stats() -> dict[str, int]:
+    return {"active": len(_prefetch_tasks), **_prefetch_stats}
@@ -0,0 +1,46 @@
+import itertools
+from typing import Any, Awaitable, Callable, Hashable
+
+from services.cache import TTLCache
+
+SNAPSHOT_TTL = 300
+SNAPSHOT_CACHE_SIZE = 200
+# Rows held across all snapshots. Shared lists (e.g. a cached response kept by
+# reference) are counted once per snapshot, so this is an upper bound.
+SNAPSHOT_MAX_ROWS = 500_000
+
+
+def _snapshot_rows(snapshot: dict[str, Any]) -> int:
+    return sum(len(value) for value in snapshot.values() if isinstance(value, list))
+
+
+_snapshots = TTLCache(max_size=SNAPSHOT_CACHE_SIZE, max_weight=SNAPSHOT_MAX_ROWS, weigh=_snapshot_rows)
+_versions = itertools.count(1)
+
+
+async def get_snapshot(
+    owner_id: int,
+    view: str,
+    params: tuple[Hashable, ...],
+    builder: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """Return the chat's prepared dataset for a report view, building it on first use.
+
+    A snapshot holds whatever the view computes over the whole dataset (filtered and
+    sorted rows, totals, titles), so page turns only slice it. Each build gets a new
+    ``version``. Snapshots are shared with prefetches and must be treated as read-only;
+    builders should keep cached response lists by reference when their order already fits.
+    """
+
+    async def build() -> dict[str, Any]:
+        return {**await builder(), "version": next(_versions)}
+
+    return await _snapshots.get_or_load((owner_id, view, params), build, ttl=SNAPSHOT_TTL)
+
+
+def invalidate_snapshots(owner_id: int, view: str | None = None) -> int:
+    return _snapshots.invalidate(lambda key: key[0] == owner_id and (view is None or key[1] == view))
+
+
+def snapshot_stats() -> dict[str, int | float]:
+    return _snapshots.stats()
@@ -1,5 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from io import BytesIO
 from pathlib import Path
 from typing import Any
@@ -7,6 +15,8 @@ from typing import Any
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import BufferedInputFile, InputMediaPhoto
 
+from services.cache import TTLCache
+
 _BG_COLOR = "#f4f7fb"
 _CARD_COLOR = "#ffffff"
 _HEADER_BG = "#1f6feb"
@@ -19,6 +29,38 @@ _ROW_ALT = "#f8fbff"
 _BRAND_TEXT = "TETRATEX_bot"
 _BRAND_LINK = "https://t.me/TETRATEX_bot"
 
+# "process" renders on every core; "thread" avoids worker start-up cost on small hosts.
+RENDER_POOL_KIND = "process"
+RENDER_WORKERS = max(1, min(4, os.cpu_count() or 1))
+RENDER_MAX_PENDING = 32
+TEXT_SIZE_CACHE_SIZE = 8192
+# Each template is a full-size RGB canvas (a few MB for wide reports).
+TABLE_TEMPLATE_CACHE_SIZE = 8
+
+# Encoder benchmark on a 1608x1311 farmers page (encode time / size):
+#   png_optimize 316ms / 162KB, png_fast 68ms / 184KB, png_palette 220ms / 74KB,
+#   jpeg 9ms / 233KB, webp 129ms / 124KB.
+# png_fast is lossless and the default. png_palette keeps the theme colours below
+# exact (row stripes, card edge); only anti-aliased text pixels, about 2% of the
+# page, are approximated.
+IMAGE_ENCODER = "png_fast"
+IMAGE_ENCODERS = {"png_optimize", "png_fast", "png_palette", "jpeg", "webp"}
+
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Set to a directory path to keep rendered PNGs across restarts.
+IMAGE_CACHE_DIR: Path | None = None
+IMAGE_CACHE_DISK_MAX_FILES = 5000
+# Bump whenever rendering output changes so stale disk entries are never served.
+_IMAGE_CACHE_VERSION = "1"
+
+# Photos already uploaded to Telegram are re-sent by file_id instead of bytes.
+TELEGRAM_FILE_ID_CACHE_SIZE = 4096
+TELEGRAM_FILE_ID_TTL = 24 * 3600
+
+_WARM_FONT_SIZES = [(34, True), (23, True), (22, False), (22, True), (21, True)]
+_BRAND_FONT_MAX_SIZE = 30
+_BRAND_FONT_MIN_SIZE = 10
+
 _LOCAL_FONTS_DIR = Path(__file__).resolve().parent.parent / "assets" / "fonts"
 
 
@@ -61,7 +103,7 @@ _FONT_PATHS = [
 ]
 
 
-def _load_font(size: int, bold: bool = False):
+def _font_candidates(bold: bool) -> list:
     from PIL import ImageFont
 
     pil_fonts_dir = Path(ImageFont.__file__).resolve().parent / "fonts"
@@ -97,22 +139,86 @@ def _load_font(size: int, bold: bool = False):
         ]
     )
     candidates.extend(_FONT_PATHS)
+    return candidates
+
+
+@lru_cache(maxsize=None)
+def _resolve_font_path(bold: bool) -> str | None:
+    from PIL import ImageFont
 
-    for path in candidates:
+    for path in _font_candidates(bold):
         normalized_path = Path(path)
         if normalized_path.is_absolute() and not normalized_path.exists():
             continue
         try:
-            return ImageFont.truetype(str(normalized_path), size)
+            ImageFont.truetype(str(normalized_path), 12)
         except OSError:
             continue
+        return str(normalized_path)
+
+    return None
+
+
+@lru_cache(maxsize=256)
+def _load_font(size: int, bold: bool = False):
+    from PIL import ImageFont
+
+    font_path = _resolve_font_path(bold)
+    if font_path is not None:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            pass
 
     return ImageFont.load_default()
 
 
+def warm_font_cache() -> None:
+    """Resolve font files and load every size build_table_image uses, ahead of the first render."""
+    for size, bold in _WARM_FONT_SIZES:
+        _load_font(size, bold=bold)
+    for size in range(_BRAND_FONT_MIN_SIZE, _BRAND_FONT_MAX_SIZE + 1):
+        _load_font(size, bold=True)
+
+
+_text_size_cache: OrderedDict[tuple[Any, str, str], tuple[int, int]] = OrderedDict()
+_text_size_lock = threading.Lock()
+_text_size_hits = 0
+_text_size_misses = 0
+
+
 def _text_size(draw, text: str, font) -> tuple[int, int]:
+    global _text_size_hits, _text_size_misses
+
+    # Font objects are memoized by _load_font, so identity is a stable key across renders.
+    key = (font, text, draw.fontmode)
+    with _text_size_lock:
+        size = _text_size_cache.get(key)
+        if size is not None:
+            _text_size_cache.move_to_end(key)
+            _text_size_hits += 1
+            return size
+
     left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
-    return right - left, bottom - top
+    size = (right - left, bottom - top)
+
+    with _text_size_lock:
+        _text_size_misses += 1
+        _text_size_cache[key] = size
+        while len(_text_size_cache) > TEXT_SIZE_CACHE_SIZE:
+            _text_size_cache.popitem(last=False)
+    return size
+
+
+def text_size_cache_stats() -> dict[str, int | float]:
+    lookups = _text_size_hits + _text_size_misses
+    return {
+        "size": len(_text_size_cache),
+        "max_size": TEXT_SIZE_CACHE_SIZE,
+        "hits": _text_size_hits,
+        "misses": _text_size_misses,
+        "hit_rate": _text_size_hits / lookups if lookups else 0.0,
+    }
 
 
 def _wrap_text_to_width(draw, text: str, font, max_width: int) -> list[str]:
@@ -171,6 +277,89 @@ def _fit_font_to_width(draw, text: str, *, target_width: int, max_size: int = 30
     return _load_font(min_size, bold=True)
 
 
+# Reserved palette entries for png_palette, so flat fills are never merged.
+_PALETTE_COLORS = (
+    _BG_COLOR,
+    _CARD_COLOR,
+    _HEADER_BG,
+    _HEADER_TEXT,
+    _TITLE_COLOR,
+    _TEXT_COLOR,
+    _MUTED_TEXT,
+    _BORDER,
+    _ROW_ALT,
+)
+
+
+def _quantize_with_theme(rgb):
+    from PIL import Image, ImageChops, ImageColor
+
+    adaptive_colors = 256 - len(_PALETTE_COLORS)
+    adaptive = rgb.quantize(colors=adaptive_colors, method=Image.Quantize.FASTOCTREE).getpalette()
+    theme = [ImageColor.getrgb(color) for color in _PALETTE_COLORS]
+    palette = [channel for color in theme for channel in color]
+    palette.extend(adaptive[: adaptive_colors * 3])
+    palette_image = Image.new("P", (1, 1))
+    palette_image.putpalette(palette)
+    quantized = rgb.quantize(palette=palette_image, dither=Image.Dither.NONE)
+
+    # Palette mapping is approximate for close colours (white card vs. #f8fbff stripes),
+    # so pixels that exactly match a theme colour are pinned to its entry.
+    for index, color in enumerate(theme):
+        diff = ImageChops.difference(rgb, Image.new("RGB", rgb.size, color)).split()
+        mask = ImageChops.lighter(ImageChops.lighter(diff[0], diff[1]), diff[2]).point(lambda value: 255 if value == 0 else 0)
+        quantized.paste(index, mask=mask)
+    return quantized
+
+
+def _encode_image(img, encoder: str) -> bytes:
+    rgb = img.convert("RGB")
+    buf = BytesIO()
+    if encoder == "png_optimize":
+        rgb.save(buf, format="PNG", optimize=True)
+    elif encoder == "png_fast":
+        rgb.save(buf, format="PNG", compress_level=3)
+    elif encoder == "png_palette":
+        _quantize_with_theme(rgb).save(buf, format="PNG", compress_level=3)
+    elif encoder == "jpeg":
+        rgb.save(buf, format="JPEG", quality=90, subsampling=0)
+    elif encoder == "webp":
+        rgb.save(buf, format="WEBP", quality=90, method=2)
+    else:
+        raise ValueError(f"encoder must be one of {', '.join(sorted(IMAGE_ENCODERS))}")
+    return buf.getvalue()
+
+
+def _image_filename(image_bytes: bytes, filename: str) -> str:
+    stem = filename.rsplit(".", 1)[0]
+    if image_bytes[:2] == b"\xff\xd8":
+        return f"{stem}.jpg"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return f"{stem}.webp"
+    return filename
+
+
+_table_templates: OrderedDict[tuple, Any] = OrderedDict()
+_table_templates_lock = threading.Lock()
+
+
+def _get_table_template(key: tuple):
+    """Pre-drawn card, branding, header band, grid and row stripes for one table layout."""
+    with _table_templates_lock:
+        template = _table_templates.get(key)
+        if template is not None:
+            _table_templates.move_to_end(key)
+        return template
+
+
+def _store_table_template(key: tuple, template) -> None:
+    with _table_templates_lock:
+        _table_templates[key] = template
+        _table_templates.move_to_end(key)
+        while len(_table_templates) > TABLE_TEMPLATE_CACHE_SIZE:
+            _table_templates.popitem(last=False)
+
+
 def _parse_cell(cell: Any) -> tuple[str, str | None]:
     if isinstance(cell, tuple) and len(cell) == 2:
         return str(cell[0]), str(cell[1])
@@ -210,44 +399,63 @@ def _build_qr_image(size: int):
         return fallback
 
 
-def _draw_branding(img, draw, *, side_padding: int, top_pad: int, image_width: int) -> None:
+@lru_cache(maxsize=1)
+def _branding_badge():
+    """QR code, brand text and card rendered once into an RGBA tile; the brand link never changes."""
+    from PIL import Image, ImageDraw
+
     qr_size = 92
-    brand_font = _fit_font_to_width(draw, _BRAND_TEXT, target_width=qr_size, max_size=30, min_size=10)
-    text_w, text_h = _text_size(draw, _BRAND_TEXT, brand_font)
     box_padding_x = 16
     box_padding_y = 10
     gap = 8
 
+    measure_draw = ImageDraw.Draw(Image.new("RGB", (10, 10), _CARD_COLOR))
+    brand_font = _fit_font_to_width(
+        measure_draw,
+        _BRAND_TEXT,
+        target_width=qr_size,
+        max_size=_BRAND_FONT_MAX_SIZE,
+        min_size=_BRAND_FONT_MIN_SIZE,
+    )
+    text_w, text_h = _text_size(measure_draw, _BRAND_TEXT, brand_font)
+
     badge_w = box_padding_x * 2 + qr_size
     badge_h = box_padding_y * 2 + qr_size + gap + text_h
-    badge_x = image_width - side_padding - badge_w
-    badge_y = top_pad
 
+    # Shape coordinates are inclusive, so the tile is one pixel larger than the badge box.
+    badge = Image.new("RGBA", (badge_w + 1, badge_h + 1), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(badge)
     draw.rounded_rectangle(
-        (badge_x, badge_y, badge_x + badge_w, badge_y + badge_h),
+        (0, 0, badge_w, badge_h),
         radius=14,
         fill="#ffffff",
         outline=_BORDER,
         width=2,
     )
 
-    qr_image = _build_qr_image(qr_size)
-    qr_x = badge_x + (badge_w - qr_size) // 2
-    qr_y = badge_y + box_padding_y
-    img.paste(qr_image, (qr_x, qr_y))
+    qr_x = (badge_w - qr_size) // 2
+    qr_y = box_padding_y
+    badge.paste(_build_qr_image(qr_size), (qr_x, qr_y))
 
-    text_x = badge_x + (badge_w - text_w) / 2
+    text_x = (badge_w - text_w) / 2
     text_y = qr_y + qr_size + gap
     draw.text((text_x, text_y), _BRAND_TEXT, font=brand_font, fill=_TITLE_COLOR)
+    return badge
 
 
-def _branding_badge_height(draw) -> int:
-    qr_size = 92
-    brand_font = _fit_font_to_width(draw, _BRAND_TEXT, target_width=qr_size, max_size=30, min_size=10)
-    _, text_h = _text_size(draw, _BRAND_TEXT, brand_font)
-    box_padding_y = 10
-    gap = 8
-    return box_padding_y * 2 + qr_size + gap + text_h
+def _draw_branding(img, *, side_padding: int, top_pad: int, image_width: int) -> None:
+    badge = _branding_badge()
+    badge_w = badge.width - 1
+    img.alpha_composite(badge, (image_width - side_padding - badge_w, top_pad))
+
+
+def _branding_badge_height() -> int:
+    return _branding_badge().height - 1
+
+
+def warm_render_caches() -> None:
+    warm_font_cache()
+    _branding_badge()
 
 
 def build_table_image(
@@ -272,9 +480,14 @@ def build_table_image(
     column_widths: list[int] | None = None,
     column_alignments: list[str] | None = None,
     min_rows: int | None = None,
+    encoder: str | None = None,
 ) -> bytes:
     from PIL import Image, ImageDraw
 
+    encoder = encoder or IMAGE_ENCODER
+    if encoder not in IMAGE_ENCODERS:
+        raise ValueError(f"encoder must be one of {', '.join(sorted(IMAGE_ENCODERS))}")
+
     title_font = _load_font(34, bold=True)
     subtitle_font = _load_font(22, bold=subtitle_bold)
     header_font = _load_font(23, bold=True)
@@ -393,17 +606,154 @@ def build_table_image(
     )
 
     # Reserve space for the QR branding badge so it cannot overlap the table header.
-    branding_bottom = top_pad + _branding_badge_height(draw) + text_gap
+    branding_bottom = top_pad + _branding_badge_height() + text_gap
     table_top = max(table_top, branding_bottom)
     row_count = max(1, len(rows), min_rows or 0)
     table_h = header_h + row_count * row_h
     image_height = table_top + table_h + footer_h + 44
 
-    img = Image.new("RGBA", (image_width, image_height), _BG_COLOR)
-    draw = ImageDraw.Draw(img)
+    drawn_row_count = max(len(rows), min_rows or 0) if rows else 1
+    template_key = (
+        image_width,
+        image_height,
+        table_top,
+        tuple(col_widths),
+        tuple(columns),
+        repr(header_groups),
+        row_span_columns,
+        drawn_row_count,
+        bool(rows),
+    )
+    x = side_padding
+    template = _get_table_template(template_key)
+    if template is None:
+        template = Image.new("RGBA", (image_width, image_height), _BG_COLOR)
+        draw = ImageDraw.Draw(template)
+
+        draw.rounded_rectangle((12, 12, image_width - 12, image_height - 12), radius=18, fill=_CARD_COLOR, outline=_BORDER, width=2)
+        _draw_branding(template, side_padding=side_padding, top_pad=top_pad, image_width=image_width)
+
+        y = table_top
+        draw.rounded_rectangle((x, y, x + table_width, y + header_h), radius=12, fill=_HEADER_BG)
 
-    draw.rounded_rectangle((12, 12, image_width - 12, image_height - 12), radius=18, fill=_CARD_COLOR, outline=_BORDER, width=2)
-    _draw_branding(img, draw, side_padding=side_padding, top_pad=top_pad, image_width=image_width)
+        cursor_x = x
+        if has_grouped_header:
+            split_y = y + header_top_h
+            split_start_x = x + sum(col_widths[:max(0, row_span_columns)])
+            if split_start_x < x + table_width:
+                draw.line((split_start_x, split_y, x + table_width, split_y), fill=_BORDER, width=1)
+
+            cumulative_widths = [x]
+            for width in col_widths:
+                cumulative_widths.append(cumulative_widths[-1] + width)
+
+            for idx in range(1, len(columns)):
+                line_top = y if idx <= row_span_columns else split_y
+                draw.line((cumulative_widths[idx], line_top, cumulative_widths[idx], y + table_h), fill=_BORDER, width=1)
+
+            group_boundary_idx = row_span_columns
+            for group in header_groups or []:
+                group_boundary_idx += int(group.get("span") or 0)
+                if group_boundary_idx >= len(columns):
+                    continue
+                draw.line((cumulative_widths[group_boundary_idx], y, cumulative_widths[group_boundary_idx], y + table_h), fill=_BORDER, width=1)
+
+            cursor_x = x
+            for idx in range(min(row_span_columns, len(columns))):
+                wrapped_lines = wrapped_column_headers[idx]
+                text_block_h = len(wrapped_lines) * header_line_h + max(0, len(wrapped_lines) - 1) * header_line_gap
+                text_y = y + (header_h - text_block_h) / 2
+                _draw_multiline_text(
+                    draw,
+                    wrapped_lines,
+                    x=cursor_x,
+                    y=text_y,
+                    font=header_font,
+                    fill=_HEADER_TEXT,
+                    line_gap=header_line_gap,
+                    align="center",
+                    box_width=col_widths[idx],
+                )
+                cursor_x += col_widths[idx]
+
+            group_start_idx = row_span_columns
+            cursor_x = x + sum(col_widths[:row_span_columns])
+            for group_idx, group in enumerate(header_groups or []):
+                span = int(group.get("span") or 0)
+                if span <= 0:
+                    continue
+                group_width = sum(col_widths[group_start_idx:group_start_idx + span])
+                wrapped_title_lines = wrapped_group_titles[group_idx]
+                title_block_h = len(wrapped_title_lines) * header_line_h + max(0, len(wrapped_title_lines) - 1) * header_line_gap
+                _draw_multiline_text(
+                    draw,
+                    wrapped_title_lines,
+                    x=cursor_x,
+                    y=y + (header_top_h - title_block_h) / 2,
+                    font=header_font,
+                    fill=_HEADER_TEXT,
+                    line_gap=header_line_gap,
+                    align="center",
+                    box_width=group_width,
+                )
+                cursor_x += group_width
+                group_start_idx += span
+
+            cursor_x = x + sum(col_widths[:row_span_columns])
+            for idx in range(row_span_columns, len(columns)):
+                wrapped_lines = wrapped_column_headers[idx]
+                text_block_h = len(wrapped_lines) * header_line_h + max(0, len(wrapped_lines) - 1) * header_line_gap
+
+                _draw_multiline_text(
+                    draw,
+                    wrapped_lines,
+                    x=cursor_x,
+                    y=y + header_top_h + (header_bottom_h - text_block_h) / 2,
+                    font=header_font,
+                    fill=_HEADER_TEXT,
+                    line_gap=header_line_gap,
+                    align="center",
+                    box_width=col_widths[idx],
+                )
+                cursor_x += col_widths[idx]
+        else:
+            for idx in range(len(columns)):
+                wrapped_lines = wrapped_column_headers[idx]
+                text_block_h = len(wrapped_lines) * header_line_h + max(0, len(wrapped_lines) - 1) * header_line_gap
+
+                _draw_multiline_text(
+                    draw,
+                    wrapped_lines,
+                    x=cursor_x,
+                    y=y + (header_h - text_block_h) / 2,
+                    font=header_font,
+                    fill=_HEADER_TEXT,
+                    line_gap=header_line_gap,
+                    align="center",
+                    box_width=col_widths[idx],
+                )
+                if idx > 0:
+                    draw.line((cursor_x, y, cursor_x, y + table_h), fill=_BORDER, width=1)
+                cursor_x += col_widths[idx]
+
+
+        y += header_h
+        if rows:
+            for row_idx in range(drawn_row_count):
+                row_bg = _ROW_ALT if row_idx % 2 == 0 else _CARD_COLOR
+                draw.rectangle((x, y, x + table_width, y + row_h), fill=row_bg)
+                draw.line((x, y + row_h, x + table_width, y + row_h), fill=_BORDER, width=1)
+                y += row_h
+        else:
+            draw.rectangle((x, y, x + table_width, y + row_h), fill=_CARD_COLOR)
+            draw.text((x + 16, y + cell_padding_y), "Маълумот йўқ", font=body_font, fill=_MUTED_TEXT)
+            draw.line((x, y + row_h, x + table_width, y + row_h), fill=_BORDER, width=1)
+
+        template = template.convert("RGB")
+        _store_table_template(template_key, template)
+
+    img = template.copy()
+    draw = ImageDraw.Draw(img)
 
     draw.text((side_padding, top_pad), title, font=title_font, fill=_TITLE_COLOR)
     subtitle_y = top_pad + title_h + title_block_gap
@@ -432,165 +782,274 @@ def build_table_image(
             top_note_x = side_padding
         draw.text((top_note_x, top_note_y), top_note, font=top_note_font, fill=top_note_color)
 
-    x = side_padding
-    y = table_top
-    draw.rounded_rectangle((x, y, x + table_width, y + header_h), radius=12, fill=_HEADER_BG)
+    y = table_top + header_h
+    for row in rows:
+        is_total_row = any((str(cell).strip().upper() == "ЖАМИ") for cell in row)
+        row_font = body_bold_font if is_total_row else body_font
+        cursor_x = x
+        for col_idx, width in enumerate(col_widths):
+            cell = row[col_idx] if col_idx < len(row) else ""
+            cell_text, cell_color = _parse_cell(cell)
+            cell_w, _ = _text_size(draw, cell_text, row_font)
+            if alignments[col_idx] == "center":
+                text_x = cursor_x + (width - cell_w) / 2
+            elif alignments[col_idx] == "right":
+                text_x = cursor_x + width - cell_w - 16
+            else:
+                text_x = cursor_x + 16
 
-    cursor_x = x
-    if has_grouped_header:
-        split_y = y + header_top_h
-        split_start_x = x + sum(col_widths[:max(0, row_span_columns)])
-        if split_start_x < x + table_width:
-            draw.line((split_start_x, split_y, x + table_width, split_y), fill=_BORDER, width=1)
+            draw.text((text_x, y + cell_padding_y), cell_text, font=row_font, fill=cell_color or _TEXT_COLOR)
+            cursor_x += width
+        y += row_h
+    y = table_top + header_h + drawn_row_count * row_h
 
-        cumulative_widths = [x]
-        for width in col_widths:
-            cumulative_widths.append(cumulative_widths[-1] + width)
+    if footer_lines:
+        y += 14
+        for line in footer_lines:
+            draw.text((side_padding, y), line, font=footer_font, fill=_TITLE_COLOR)
+            y += _text_size(draw, line, footer_font)[1] + 12
 
-        for idx in range(1, len(columns)):
-            line_top = y if idx <= row_span_columns else split_y
-            draw.line((cumulative_widths[idx], line_top, cumulative_widths[idx], y + table_h), fill=_BORDER, width=1)
+    return _encode_image(img, encoder)
 
-        group_boundary_idx = row_span_columns
-        for group in header_groups or []:
-            group_boundary_idx += int(group.get("span") or 0)
-            if group_boundary_idx >= len(columns):
-                continue
-            draw.line((cumulative_widths[group_boundary_idx], y, cumulative_widths[group_boundary_idx], y + table_h), fill=_BORDER, width=1)
 
-        cursor_x = x
-        for idx in range(min(row_span_columns, len(columns))):
-            wrapped_lines = wrapped_column_headers[idx]
-            text_block_h = len(wrapped_lines) * header_line_h + max(0, len(wrapped_lines) - 1) * header_line_gap
-            text_y = y + (header_h - text_block_h) / 2
-            _draw_multiline_text(
-                draw,
-                wrapped_lines,
-                x=cursor_x,
-                y=text_y,
-                font=header_font,
-                fill=_HEADER_TEXT,
-                line_gap=header_line_gap,
-                align="center",
-                box_width=col_widths[idx],
-            )
-            cursor_x += col_widths[idx]
+_render_executor: Executor | None = None
+_render_slots: asyncio.Semaphore | None = None
 
-        group_start_idx = row_span_columns
-        cursor_x = x + sum(col_widths[:row_span_columns])
-        for group_idx, group in enumerate(header_groups or []):
-            span = int(group.get("span") or 0)
-            if span <= 0:
-                continue
-            group_width = sum(col_widths[group_start_idx:group_start_idx + span])
-            wrapped_title_lines = wrapped_group_titles[group_idx]
-            title_block_h = len(wrapped_title_lines) * header_line_h + max(0, len(wrapped_title_lines) - 1) * header_line_gap
-            _draw_multiline_text(
-                draw,
-                wrapped_title_lines,
-                x=cursor_x,
-                y=y + (header_top_h - title_block_h) / 2,
-                font=header_font,
-                fill=_HEADER_TEXT,
-                line_gap=header_line_gap,
-                align="center",
-                box_width=group_width,
-            )
-            cursor_x += group_width
-            group_start_idx += span
-
-        cursor_x = x + sum(col_widths[:row_span_columns])
-        for idx in range(row_span_columns, len(columns)):
-            wrapped_lines = wrapped_column_headers[idx]
-            text_block_h = len(wrapped_lines) * header_line_h + max(0, len(wrapped_lines) - 1) * header_line_gap
-
-            _draw_multiline_text(
-                draw,
-                wrapped_lines,
-                x=cursor_x,
-                y=y + header_top_h + (header_bottom_h - text_block_h) / 2,
-                font=header_font,
-                fill=_HEADER_TEXT,
-                line_gap=header_line_gap,
-                align="center",
-                box_width=col_widths[idx],
+
+def _get_render_executor() -> Executor:
+    global _render_executor
+
+    if _render_executor is None:
+        if RENDER_POOL_KIND == "process":
+            # Spawned workers: forking a process that already runs an event loop and threads is unsafe.
+            _render_executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_render_caches,
             )
-            cursor_x += col_widths[idx]
-    else:
-        for idx in range(len(columns)):
-            wrapped_lines = wrapped_column_headers[idx]
-            text_block_h = len(wrapped_lines) * header_line_h + max(0, len(wrapped_lines) - 1) * header_line_gap
-
-            _draw_multiline_text(
-                draw,
-                wrapped_lines,
-                x=cursor_x,
-                y=y + (header_h - text_block_h) / 2,
-                font=header_font,
-                fill=_HEADER_TEXT,
-                line_gap=header_line_gap,
-                align="center",
-                box_width=col_widths[idx],
+        else:
+            _render_executor = ThreadPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                thread_name_prefix="table-render",
+                initializer=warm_render_caches,
             )
-            if idx > 0:
-                draw.line((cursor_x, y, cursor_x, y + table_h), fill=_BORDER, width=1)
-            cursor_x += col_widths[idx]
-
-    y += header_h
-    if rows:
-        padded_rows = rows
-        if min_rows and len(rows) < min_rows:
-            padded_rows = rows + [["" for _ in columns] for _ in range(min_rows - len(rows))]
-
-        for row_idx, row in enumerate(padded_rows):
-            row_bg = _ROW_ALT if row_idx % 2 == 0 else _CARD_COLOR
-            draw.rectangle((x, y, x + table_width, y + row_h), fill=row_bg)
-            is_total_row = any((str(cell).strip().upper() == "ЖАМИ") for cell in row)
-            row_font = body_bold_font if is_total_row else body_font
-            cursor_x = x
-            for col_idx, width in enumerate(col_widths):
-                cell = row[col_idx] if col_idx < len(row) else ""
-                cell_text, cell_color = _parse_cell(cell)
-                cell_w, _ = _text_size(draw, cell_text, row_font)
-                if alignments[col_idx] == "center":
-                    text_x = cursor_x + (width - cell_w) / 2
-                elif alignments[col_idx] == "right":
-                    text_x = cursor_x + width - cell_w - 16
-                else:
-                    text_x = cursor_x + 16
-
-                draw.text((text_x, y + cell_padding_y), cell_text, font=row_font, fill=cell_color or _TEXT_COLOR)
-                cursor_x += width
-            draw.line((x, y + row_h, x + table_width, y + row_h), fill=_BORDER, width=1)
-            y += row_h
+    return _render_executor
+
+
+async def start_render_pool():
+    _get_render_executor()
+
+
+async def stop_render_pool():
+    global _render_executor
+
+    executor, _render_executor = _render_executor, None
+    if executor is not None:
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+class _ImageCache:
+    """Content-addressed PNG cache: byte-bounded in-memory LRU plus an optional disk tier."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def read_disk(self, key: str) -> bytes | None:
+        if IMAGE_CACHE_DIR is None:
+            return None
+        try:
+            return (Path(IMAGE_CACHE_DIR) / f"{key}.png").read_bytes()
+        except OSError:
+            return None
+
+    def write_disk(self, key: str, data: bytes) -> None:
+        if IMAGE_CACHE_DIR is None:
+            return
+
+        cache_dir = Path(IMAGE_CACHE_DIR)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_dir / f"{key}.tmp"
+            tmp_path.write_bytes(data)
+            tmp_path.replace(cache_dir / f"{key}.png")
+        except OSError:
+            return
+
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk(cache_dir)
+
+    def _prune_disk(self, cache_dir: Path) -> None:
+        try:
+            files = sorted(cache_dir.glob("*.png"), key=lambda path: path.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[: max(0, len(files) - IMAGE_CACHE_DISK_MAX_FILES)]:
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+_image_cache = _ImageCache(IMAGE_CACHE_MAX_BYTES)
+_telegram_file_ids = TTLCache(max_size=TELEGRAM_FILE_ID_CACHE_SIZE)
+_image_renders: dict[str, asyncio.Task] = {}
+
+
+def table_image_key(**kwargs: Any) -> str:
+    # repr keeps tuples (coloured cells) distinct from lists, unlike JSON.
+    payload = repr((_IMAGE_CACHE_VERSION, sorted(kwargs.items())))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def image_cache_stats() -> dict[str, int | float]:
+    return _image_cache.stats()
+
+
+def clear_image_cache() -> None:
+    _image_cache.clear()
+
+
+async def _render_in_pool(**kwargs: Any) -> bytes:
+    global _render_slots
+
+    if _render_slots is None:
+        _render_slots = asyncio.Semaphore(RENDER_MAX_PENDING)
+
+    async with _render_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_render_executor(), partial(build_table_image, **kwargs))
+
+
+async def _load_or_render(key: str, kwargs: dict[str, Any]) -> bytes:
+    image_bytes = await asyncio.to_thread(_image_cache.read_disk, key)
+    if image_bytes is not None:
+        _image_cache.disk_hits += 1
     else:
-        draw.rectangle((x, y, x + table_width, y + row_h), fill=_CARD_COLOR)
-        draw.text((x + 16, y + cell_padding_y), "Маълумот йўқ", font=body_font, fill=_MUTED_TEXT)
-        draw.line((x, y + row_h, x + table_width, y + row_h), fill=_BORDER, width=1)
-        y += row_h
+        _image_cache.misses += 1
+        image_bytes = await _render_in_pool(**kwargs)
+        await asyncio.to_thread(_image_cache.write_disk, key, image_bytes)
 
-    if footer_lines:
-        y += 14
-        for line in footer_lines:
-            draw.text((side_padding, y), line, font=footer_font, fill=_TITLE_COLOR)
-            y += _text_size(draw, line, footer_font)[1] + 12
+    _image_cache.put(key, image_bytes)
+    return image_bytes
 
-    buf = BytesIO()
-    img.convert("RGB").save(buf, format="PNG", optimize=True)
-    return buf.getvalue()
 
+async def render_table_image(**kwargs: Any) -> bytes:
+    """Awaitable build_table_image that runs in the render pool instead of on the event loop.
 
-async def send_or_edit_table_image(target, image_bytes: bytes, keyboard, edit: bool):
-    file = BufferedInputFile(image_bytes, filename="table.png")
+    Identical argument sets are served from the content-addressed image cache, and
+    concurrent requests for the same image share a single render. At most
+    RENDER_MAX_PENDING renders are queued on the pool; further callers wait for a slot.
+    """
+    # Pin the encoder here so spawned render workers and cache keys agree on it.
+    kwargs.setdefault("encoder", IMAGE_ENCODER)
+    key = table_image_key(**kwargs)
+    image_bytes = _image_cache.get(key)
+    if image_bytes is not None:
+        _image_cache.hits += 1
+        return image_bytes
+
+    task = _image_renders.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_or_render(key, kwargs))
+        _image_renders[key] = task
+        task.add_done_callback(lambda _: _image_renders.pop(key, None))
+
+    return await asyncio.shield(task)
+
+
+def _image_digest(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def _remember_file_id(digest: str, message) -> None:
+    # edit_media on inline messages returns True instead of a Message.
+    photos = getattr(message, "photo", None)
+    if photos:
+        _telegram_file_ids.set(digest, photos[-1].file_id, ttl=TELEGRAM_FILE_ID_TTL)
+
+
+def _forget_file_id(digest: str) -> None:
+    _telegram_file_ids.invalidate(lambda key: key == digest)
+
+
+async def _edit_table_image(target, media, keyboard, digest: str) -> bool:
+    """Edit the message in place; True when it now shows the image."""
+    try:
+        edited = await target.edit_media(media=InputMediaPhoto(media=media), reply_markup=keyboard)
+    except TelegramBadRequest as exc:
+        return "message is not modified" in str(exc)
+    _remember_file_id(digest, edited)
+    return True
+
+
+async def send_or_edit_table_image(target, image_bytes: bytes, keyboard, edit: bool, filename: str = "table.png"):
+    digest = _image_digest(image_bytes)
+    file_id = _telegram_file_ids.get(digest)
+    filename = _image_filename(image_bytes, filename)
 
     if edit:
-        try:
-            await target.edit_media(media=InputMediaPhoto(media=file), reply_markup=keyboard)
+        if file_id is not None:
+            if await _edit_table_image(target, file_id, keyboard, digest):
+                return
+            # The cached file_id may be stale; retry the edit once with the bytes
+            # so pagination keeps editing in place.
+            _forget_file_id(digest)
+            file_id = None
+        if await _edit_table_image(target, BufferedInputFile(image_bytes, filename=filename), keyboard, digest):
             return
-        except TelegramBadRequest:
-            pass
 
-    await target.answer_photo(photo=file, reply_markup=keyboard)
+    try:
+        sent = await target.answer_photo(
+            photo=file_id or BufferedInputFile(image_bytes, filename=filename),
+            reply_markup=keyboard,
+        )
+    except TelegramBadRequest:
+        if file_id is None:
+            raise
+        _forget_file_id(digest)
+        sent = await target.answer_photo(photo=BufferedInputFile(image_bytes, filename=filename), reply_markup=keyboard)
+    _remember_file_id(digest, sent)
+
     if edit:
         try:
             await target.delete()
@@ -0,0 +1,30 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+@contextmanager
+def stage_timer(timings: dict[str, float], stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - started
+
+
+def timed(timings: dict[str, float], stage: str, factory: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+    async def run() -> T:
+        with stage_timer(timings, stage):
+            return await factory()
+
+    return run
+
+
+def log_timings(logger: logging.Logger, label: str, timings: dict[str, float]) -> None:
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    stages = ", ".join(f"{stage}={elapsed * 1000:.1f}ms" for stage, elapsed in timings.items())
+    logger.debug("%s timings: %s", label, stages)